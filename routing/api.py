@@ -4,40 +4,194 @@ Flask API for train routing service.
 Provides REST endpoints to get routes between stations using station IDs.
 """
 
+import gzip
+import hashlib
 import sys
+import time
+import datetime
+from functools import lru_cache
 from pathlib import Path
+from typing import Optional, Tuple
 
-from flask import Flask, jsonify, request
+from flask import Flask, Response, jsonify, request
+from flask.json.provider import JSONProvider
 from flask_cors import CORS
 
+try:
+    import orjson
+except ImportError:  # Optional: fall back to Flask's stdlib json provider
+    orjson = None
+
 # Add the routing module to the path
 sys.path.append(str(Path(__file__).parent))
-from routing import DATA_DIR_DEFAULT, getRoute, load_stops
+from loading import load_stops, source_paths
+from routing import DATA_DIR_DEFAULT, getRoute, warmup
+
+
+class ORJSONProvider(JSONProvider):
+    """JSON provider that serializes responses with orjson."""
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        # Hand orjson's bytes straight to the response, skipping a decode/encode round trip
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(orjson.dumps(obj), mimetype="application/json")
+
 
 app = Flask(__name__)
+if orjson is not None:
+    app.json = ORJSONProvider(app)
 CORS(app)  # Enable CORS for frontend access
 
+# Parse the GTFS feed and build today's timetable at import so requests never
+# pay for it; under gunicorn --preload these are shared by all workers
+try:
+    warmup(datetime.date.today().isoformat())
+except FileNotFoundError:
+    pass
+
+
+STAT_TTL_SECONDS = 5  # how long feed file mtimes are trusted before re-checking
+COMPRESS_MIN_SIZE = 500  # bytes; smaller JSON bodies are sent uncompressed
+COMPRESS_LEVEL = 6
+
+
+def _accepts_gzip() -> bool:
+    return request.accept_encodings["gzip"] > 0
+
+
+@app.after_request
+def _compress_response(response):
+    """
+    Gzip JSON responses for clients that accept it.
+
+    Responses that already carry a Content-Encoding (such as the
+    pre-compressed stations body) are left untouched.
+    """
+    if (
+        response.status_code != 200
+        or response.mimetype != "application/json"
+        or response.direct_passthrough
+        or "Content-Encoding" in response.headers
+        or not _accepts_gzip()
+    ):
+        return response
+    data = response.get_data()
+    if len(data) < COMPRESS_MIN_SIZE:
+        return response
+    response.set_data(gzip.compress(data, compresslevel=COMPRESS_LEVEL))
+    response.headers["Content-Encoding"] = "gzip"
+    response.vary.add("Accept-Encoding")
+    return response
+
+
+@lru_cache(maxsize=4)
+def _cached_mtime_ns(paths: Tuple[str, ...], tick: int) -> Tuple[Optional[int], ...]:
+    """
+    stat() a group of files at most once per STAT_TTL_SECONDS window.
+
+    The tick (current time bucket) is only part of the cache key.
+
+    Returns:
+        Each file's nanosecond mtime, or None if it does not exist
+    """
+    mtimes = []
+    for path in paths:
+        try:
+            mtimes.append(Path(path).stat().st_mtime_ns)
+        except FileNotFoundError:
+            mtimes.append(None)
+    return tuple(mtimes)
+
+
+@lru_cache(maxsize=4)
+def _stations_body(stops_path: str, mtime_ns: int) -> Tuple[bytes, bytes, str]:
+    """
+    Serialize the stations response for a given snapshot of stops.csv.
+
+    The nanosecond mtime is only part of the cache key, so the body is rebuilt
+    when the file changes on disk (even within the same second) and served
+    from memory otherwise.
+
+    Returns:
+        The JSON body, its gzip-compressed copy and the body's ETag
+    """
+    stops = load_stops(Path(stops_path))
+    stations = [
+        {
+            "stop_id": stop.stop_id,
+            "stop_name": stop.name,
+            "stop_lat": stop.lat,
+            "stop_lon": stop.lon
+        }
+        for stop in stops.values()
+    ]
+    body = app.json.dumps({"stations": stations, "success": True}).encode()
+    return body, gzip.compress(body, compresslevel=COMPRESS_LEVEL), hashlib.sha1(body).hexdigest()
+
+
+ROUTE_CACHE_MAX_AGE = 300  # seconds clients and proxies may reuse a route response
+
+
+# The files a route is computed from, stat()ed to key the route cache
+FEED_PATHS = tuple(map(str, source_paths(DATA_DIR_DEFAULT)))
+
+
+class _RouteError(Exception):
+    """Carries an error result out of _cached_route so it is not memoized."""
+
+    def __init__(self, result: dict):
+        super().__init__(result.get("error"))
+        self.result = result
+
+
+@lru_cache(maxsize=1024)
+def _cached_route(origin_id: str, destination_id: str, start_time: str, date: str, feed_mtimes: Tuple) -> dict:
+    """
+    Memoize successful route results per (from, to, time, date) query.
+
+    Identical queries on the same feed always produce the same answer, so
+    repeated UI requests skip the search. The feed's mtimes are only part of
+    the cache key, so results computed from an older feed are not served
+    once the files change on disk.
+
+    Raises:
+        _RouteError: If getRoute returned an error. lru_cache does not store
+            exceptions, so a transient failure is retried on the next request.
+    """
+    result = getRoute(origin_id, destination_id, start_time, date=date)
+    if "error" in result:
+        raise _RouteError(result)
+    return result
+
+
 @app.route('/api/route', methods=['GET'])
 def get_route_api():
     """
     Get route between two stations via GET request.
     
     Query parameters:
-        - from: Origin station ID (e.g., "830012810")
-        - to: Destination station ID (e.g., "830012818")
+        - from: Origin station ID (e.g., "830012810") or (partial) station name
+        - to: Destination station ID (e.g., "830012818") or (partial) station name
         - time: Optional departure time (HH:MM:SS format, default: "08:00:00")
         - date: Optional departure date (YYYY-MM-DD format, default: today)
     
     Example:
         GET /api/route?from=830012810&to=830012818
         GET /api/route?from=830012810&to=830012818&time=09:30:00
+        GET /api/route?from=CAGLIARI&to=OLBIA
     """
     try:
         # Get parameters from query string
         origin_id = request.args.get('from')
         destination_id = request.args.get('to')
         start_time = request.args.get('time', '08:00:00')
-        date = request.args.get('date')  # Optional date parameter
+        date = request.args.get('date') or datetime.date.today().isoformat()  # Optional date parameter
         
         # Validate required parameters
         if not origin_id:
@@ -45,16 +199,19 @@ def get_route_api():
         if not destination_id:
             return jsonify({"error": "Missing 'to' parameter (station ID required)", "success": False}), 400
         
-        # Get the route
-        result = getRoute(origin_id, destination_id, start_time, date=date)
-        
-        # Check if there was an error
-        if "error" in result:
-            return jsonify(result), 404
+        # Get the route (copied, since the cached dict is shared between requests)
+        feed_mtimes = _cached_mtime_ns(FEED_PATHS, int(time.time() // STAT_TTL_SECONDS))
+        try:
+            result = dict(_cached_route(origin_id, destination_id, start_time, date, feed_mtimes))
+        except _RouteError as e:
+            return jsonify(e.result), 404
         
         # Add success flag
         result["success"] = True
-        return jsonify(result)
+        response = jsonify(result)
+        response.cache_control.public = True
+        response.cache_control.max_age = ROUTE_CACHE_MAX_AGE
+        return response
         
     except Exception as e:
         return jsonify({"error": str(e), "success": False}), 500
@@ -79,22 +236,25 @@ def get_stations():
         }
     """
     try:
-        stops_path = DATA_DIR_DEFAULT / "stops.csv"
-        if not stops_path.exists():
+        stops_path = str(DATA_DIR_DEFAULT / "stops.csv")
+        (mtime_ns,) = _cached_mtime_ns((stops_path,), int(time.time() // STAT_TTL_SECONDS))
+        if mtime_ns is None:
             return jsonify({"error": "Stops data not found", "success": False}), 404
         
-        stops = load_stops(stops_path)
-        stations = [
-            {
-                "stop_id": stop.stop_id,
-                "stop_name": stop.name,
-                "stop_lat": stop.lat,
-                "stop_lon": stop.lon
-            }
-            for stop in stops.values()
-        ]
+        body, gzipped_body, etag = _stations_body(stops_path, mtime_ns)
+        
+        # Serve the copy compressed at build time to clients that accept gzip
+        if _accepts_gzip():
+            response = Response(gzipped_body, mimetype="application/json")
+            response.headers["Content-Encoding"] = "gzip"
+            etag += "-gzip"
+        else:
+            response = Response(body, mimetype="application/json")
+        response.vary.add("Accept-Encoding")
         
-        return jsonify({"stations": stations, "success": True})
+        # Clients sending a matching If-None-Match get a bodiless 304
+        response.set_etag(etag)
+        return response.make_conditional(request)
         
     except Exception as e:
         return jsonify({"error": str(e), "success": False}), 500
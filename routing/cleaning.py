@@ -1,10 +1,16 @@
 import pandas as pd, pathlib, shutil
 data_dir = pathlib.Path("public/data")
+
+def col_all_empty(series):
+    # Define "empty" as all values NaN or blank after strip. Non-text columns
+    # can only be empty through NaN, so only the non-null values need stripping;
+    # object columns may hold non-strings (e.g. booleans), so stringify them first.
+    if series.dtype != object and not pd.api.types.is_string_dtype(series):
+        return series.isna().all()
+    return series.dropna().astype(str).str.strip().eq("").all()
+
 for p in data_dir.glob("*.csv"):
     df = pd.read_csv(p)
-    # Define "empty" as all values NaN or blank after strip
-    def col_all_empty(series):
-        return series.isna().all() or series.astype(str).str.strip().replace({"nan":""}).eq("").all()
     to_drop = [c for c in df.columns if col_all_empty(df[c])]
     if to_drop:
         df.drop(columns=to_drop).to_csv(p, index=False)
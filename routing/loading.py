@@ -2,17 +2,34 @@
 Data loading utilities for GTFS files.
 
 This module contains all functions for loading and parsing GTFS CSV files
-including stops, stop_times, routes, and trips data.
+including stops, stop_times, routes, and trips data. Parquet copies produced
+by to_parquet.py are used instead of the CSVs when pyarrow is available.
 """
 
 import csv
-from collections import defaultdict
-from dataclasses import dataclass
+import hashlib
+import pickle
+import sys
+import tempfile
+from array import array
+from bisect import bisect_left
+from collections import OrderedDict, defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime
+from operator import itemgetter
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Set, Tuple
 
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.csv as pacsv
+    import pyarrow.parquet as pq
+except ImportError:  # Optional: Parquet copies and bulk stop_times parsing need pyarrow
+    pa = pc = pacsv = pq = None
 
-@dataclass
+
+@dataclass(slots=True, frozen=True)
 class Stop:
     stop_id: str
     name: str
@@ -20,6 +37,119 @@ class Stop:
     lon: float
 
 
+@dataclass
+class StopTimes:
+    """Structure-of-arrays view of stop_times.csv.
+    
+    Rows are grouped by trip and ordered by stop_sequence. The rows of
+    trip_ids[t] occupy the half-open range [trip_offsets[t], trip_offsets[t + 1])
+    of every per-row column. Times are seconds since midnight, with -1 for
+    missing or unparseable values.
+    """
+    trip_ids: List[str] = field(default_factory=list)
+    trip_offsets: array = field(default_factory=lambda: array("l", [0]))
+    stop_ids: List[str] = field(default_factory=list)
+    arrival_secs: array = field(default_factory=lambda: array("l"))
+    departure_secs: array = field(default_factory=lambda: array("l"))
+    stop_sequences: array = field(default_factory=lambda: array("l"))
+
+    def trip_rows(self, trip_idx: int) -> range:
+        """Return the row indices belonging to the trip at trip_idx."""
+        return range(self.trip_offsets[trip_idx], self.trip_offsets[trip_idx + 1])
+
+
+def parse_time_to_seconds(t: str) -> Optional[int]:
+    # Fast path for the canonical zero-padded HH:MM:SS layout
+    if len(t) == 8 and t[2] == ":" and t[5] == ":":
+        hours, minutes, seconds = t[0:2], t[3:5], t[6:8]
+        if (hours + minutes + seconds).isdigit() and t.isascii():
+            hours, minutes, seconds = int(hours), int(minutes), int(seconds)
+            if hours < 24 and minutes < 60 and seconds < 60:
+                return hours * 3600 + minutes * 60 + seconds
+            return None
+    if not t or t.lower() == "nan":
+        return None
+    try:
+        dt = datetime.strptime(t.strip(), "%H:%M:%S")
+        return dt.hour * 3600 + dt.minute * 60 + dt.second
+    except ValueError:
+        return None
+
+
+def _safe_float(value: str) -> Optional[float]:
+    """Parse a coordinate, treating blanks as 0.0 and malformed values as None."""
+    try:
+        return float(value or 0.0)
+    except ValueError:
+        return None
+
+
+def _parquet_sibling(path: Path) -> Optional[Path]:
+    """Return the Parquet copy of a CSV file if it can be read and is up to date."""
+    if pq is None:
+        return None
+    parquet_path = path.with_suffix(".parquet")
+    try:
+        parquet_mtime = parquet_path.stat().st_mtime
+    except FileNotFoundError:
+        return None
+    try:
+        if path.stat().st_mtime > parquet_mtime:
+            return None  # CSV was edited after the conversion
+    except FileNotFoundError:
+        pass
+    return parquet_path
+
+
+def _padded_rows(rows: Iterator[List[str]], width: int) -> Iterator[List[str]]:
+    """Skip blank rows and pad short ones with empty strings up to width fields."""
+    for row in rows:
+        if len(row) >= width:
+            yield row
+        elif row:
+            yield row + [""] * (width - len(row))
+
+
+def read_columns(path: Path, columns: List[str]) -> Iterator[Tuple[str, ...]]:
+    """Yield only the requested columns of a CSV file as tuples.
+    
+    Column positions are resolved once from the header, so no per-row dict
+    is built. Columns missing from the header or from a short row read as
+    empty strings, and blank lines are skipped. If an up-to-date Parquet copy
+    written by to_parquet.py sits next to the CSV, only the requested columns
+    are read from it instead.
+    
+    Args:
+        path: Path to the CSV file
+        columns: Column names to extract, in the order they should be yielded
+        
+    Returns:
+        Iterator of tuples with one value per requested column
+    """
+    parquet_path = _parquet_sibling(path)
+    if parquet_path is not None:
+        # Read in record batches so only one batch of Python values is alive at a time
+        parquet_file = pq.ParquetFile(parquet_path)
+        present = set(parquet_file.schema_arrow.names)
+        batches = parquet_file.iter_batches(columns=[c for c in columns if c in present])
+        for batch in batches:
+            empty = [""] * batch.num_rows
+            yield from zip(*(batch.column(c).to_pylist() if c in present else empty for c in columns))
+        return
+
+    with path.open(encoding="utf-8") as f:
+        reader = csv.reader(f)
+        header = next(reader, [])
+        index = {name: i for i, name in enumerate(header)}
+        positions = [index.get(name, len(header)) for name in columns]
+        rows = _padded_rows(reader, max(positions, default=0) + 1)
+        if len(positions) == 1:
+            for row in rows:
+                yield (row[positions[0]],)
+        else:
+            yield from map(itemgetter(*positions), rows)
+
+
 def load_stops(stops_path: Path) -> Dict[str, Stop]:
     """Load stops from GTFS stops.csv file.
     
@@ -29,42 +159,175 @@ def load_stops(stops_path: Path) -> Dict[str, Stop]:
     Returns:
         Dictionary mapping stop_id to Stop objects
     """
-    stops: Dict[str, Stop] = {}
-    with stops_path.open(encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            if not row.get("stop_id"):
-                continue
-            try:
-                stops[row["stop_id"]] = Stop(
-                    stop_id=row["stop_id"],
-                    name=row.get("stop_name", ""),
-                    lat=float(row.get("stop_lat") or 0.0),
-                    lon=float(row.get("stop_lon") or 0.0),
-                )
-            except ValueError:
-                continue
-    return stops
-
-
-def load_stop_times_by_trip(stop_times_path: Path) -> Dict[str, List[dict]]:
+    columns = ["stop_id", "stop_name", "stop_lat", "stop_lon"]
+    rows = (
+        (sys.intern(stop_id), name, _safe_float(lat), _safe_float(lon))
+        for stop_id, name, lat, lon in read_columns(stops_path, columns)
+    )
+    # Rows without an id or with malformed coordinates are skipped
+    return {
+        stop_id: Stop(stop_id, name, lat, lon)
+        for stop_id, name, lat, lon in rows
+        if stop_id and lat is not None and lon is not None
+    }
+
+
+def _reorder_rows(stop_times: StopTimes, order: List[int]) -> None:
+    """Permute every per-row column of stop_times into the given row order."""
+    stop_times.stop_ids = [stop_times.stop_ids[i] for i in order]
+    for name in ("arrival_secs", "departure_secs", "stop_sequences"):
+        column = getattr(stop_times, name)
+        setattr(stop_times, name, array(column.typecode, [column[i] for i in order]))
+
+
+def _read_table(path: Path, columns: List[str]):
+    """Read the requested columns of a CSV file (or its Parquet copy) as an Arrow table of strings.
+    
+    Returns None when pyarrow is not installed or a column is missing.
+    """
+    if pa is None:
+        return None
+    parquet_path = _parquet_sibling(path)
+    if parquet_path is not None:
+        if not set(columns) <= set(pq.read_schema(parquet_path).names):
+            return None
+        table = pq.read_table(parquet_path, columns=columns)
+    else:
+        convert_options = pacsv.ConvertOptions(
+            include_columns=columns,
+            column_types={name: pa.string() for name in columns},
+            strings_can_be_null=False,
+        )
+        try:
+            table = pacsv.read_csv(path, convert_options=convert_options)
+        except (KeyError, pa.ArrowInvalid):
+            return None  # e.g. a short row; the streaming reader pads it
+    return table.cast(pa.schema([(name, pa.string()) for name in columns])).combine_chunks()
+
+
+def _stop_times_from_table(table) -> StopTimes:
+    """Build StopTimes from an Arrow table with vectorized parsing and sorting.
+    
+    Produces exactly what the streaming loader does: trips in order of first
+    appearance, rows stably sorted by stop_sequence within each trip.
+    """
+    stop_times = StopTimes()
+    if table.num_rows == 0:
+        return stop_times
+
+    def column(name):
+        return table.column(name).chunk(0)
+
+    # Trip codes are assigned in order of first appearance
+    trip_codes = pc.dictionary_encode(column("trip_id"))
+    stop_times.trip_ids = [sys.intern(trip_id) for trip_id in trip_codes.dictionary.to_pylist()]
+    sequences = column("stop_sequence")
+    sequences = pc.cast(pc.if_else(pc.equal(sequences, ""), "0", sequences), pa.int64())
+
+    order = pc.sort_indices(
+        pa.table({"trip": trip_codes.indices, "seq": sequences}),
+        sort_keys=[("trip", "ascending"), ("seq", "ascending")],
+    )
+
+    # Each distinct time string is parsed once, then gathered per row
+    def to_secs(name):
+        codes = pc.dictionary_encode(column(name))
+        parsed = [parse_time_to_seconds(t) for t in codes.dictionary.to_pylist()]
+        lookup = pa.array([-1 if secs is None else secs for secs in parsed], pa.int64())
+        return pc.take(lookup, pc.take(codes.indices, order))
+
+    # Rows share one interned string per distinct stop_id
+    stop_codes = pc.dictionary_encode(column("stop_id"))
+    stop_ids = [sys.intern(stop_id) for stop_id in stop_codes.dictionary.to_pylist()]
+    stop_times.stop_ids = [stop_ids[i] for i in pc.take(stop_codes.indices, order).to_pylist()]
+    stop_times.arrival_secs = array("l", to_secs("arrival_time").to_pylist())
+    stop_times.departure_secs = array("l", to_secs("departure_time").to_pylist())
+    stop_times.stop_sequences = array("l", pc.take(sequences, order).to_pylist())
+
+    offsets = stop_times.trip_offsets
+    for count in pc.value_counts(trip_codes.indices).field("counts").to_pylist():
+        offsets.append(offsets[-1] + count)
+    return stop_times
+
+
+def load_stop_times_by_trip(stop_times_path: Path) -> StopTimes:
     """Load stop times organized by trip from GTFS stop_times.csv file.
     
+    With pyarrow installed, the file is parsed and grouped by trip in bulk,
+    with each distinct time string converted once. Otherwise rows are
+    streamed straight into the StopTimes columns, so no per-row Python
+    objects are kept while reading. Feeds normally list each trip
+    contiguously in stop_sequence order; only when they don't are the
+    columns reordered afterwards.
+    
     Args:
         stop_times_path: Path to stop_times.csv file
         
     Returns:
-        Dictionary mapping trip_id to ordered list of stop_times rows
+        StopTimes columns with the rows of each trip stored contiguously,
+        ordered by stop_sequence
     """
-    trips = defaultdict(list)
-    with stop_times_path.open(encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            trips[row["trip_id"]].append(row)
-    # Sort each trip by stop_sequence
-    for trip_id in trips:
-        trips[trip_id].sort(key=lambda r: int(r.get("stop_sequence", 0)))
-    return trips
+    columns = ["trip_id", "stop_id", "arrival_time", "departure_time", "stop_sequence"]
+    table = _read_table(stop_times_path, columns)
+    if table is not None:
+        try:
+            return _stop_times_from_table(table)
+        except pa.ArrowInvalid:
+            pass  # e.g. a stop_sequence int() accepts but Arrow can't cast; use the streaming path
+
+    # Each distinct time string is parsed once, not once per row
+    seconds: Dict[str, int] = {}
+    def to_secs(t: str) -> int:
+        secs = seconds.get(t)
+        if secs is None:
+            parsed = parse_time_to_seconds(t)
+            secs = seconds[t] = -1 if parsed is None else parsed
+        return secs
+
+    stop_times = StopTimes()
+    trip_index: Dict[str, int] = {}
+    row_trips = array("l")  # trip index of every row, in file order
+    intern = sys.intern  # ids repeat on every row; keep one string per distinct id
+    grouped = True
+    last_trip, last_seq = -1, 0
+    for trip_id, stop_id, arrival_time, departure_time, seq in read_columns(stop_times_path, columns):
+        seq = int(seq or 0)
+        trip_idx = trip_index.get(trip_id)
+        if trip_idx is None:
+            trip_idx = trip_index[trip_id] = len(stop_times.trip_ids)
+            stop_times.trip_ids.append(intern(trip_id))
+        elif trip_idx != last_trip or seq < last_seq:
+            grouped = False
+        last_trip, last_seq = trip_idx, seq
+        row_trips.append(trip_idx)
+        stop_times.stop_ids.append(intern(stop_id))
+        stop_times.arrival_secs.append(to_secs(arrival_time))
+        stop_times.departure_secs.append(to_secs(departure_time))
+        stop_times.stop_sequences.append(seq)
+
+    counts = [0] * len(stop_times.trip_ids)
+    for trip_idx in row_trips:
+        counts[trip_idx] += 1
+    offsets = stop_times.trip_offsets
+    for count in counts:
+        offsets.append(offsets[-1] + count)
+
+    if not grouped:
+        # Scatter rows into preallocated per-trip slots (a counting sort on
+        # the trip index), keeping trips in order of first appearance, then
+        # sort by stop_sequence only the trips listed out of order
+        order = [0] * len(row_trips)
+        next_slot = offsets[:-1].tolist()
+        for row, trip_idx in enumerate(row_trips):
+            order[next_slot[trip_idx]] = row
+            next_slot[trip_idx] += 1
+        sequences = stop_times.stop_sequences
+        for trip_idx in range(len(counts)):
+            lo, hi = offsets[trip_idx], offsets[trip_idx + 1]
+            if any(sequences[order[i + 1]] < sequences[order[i]] for i in range(lo, hi - 1)):
+                order[lo:hi] = sorted(order[lo:hi], key=sequences.__getitem__)
+        _reorder_rows(stop_times, order)
+    return stop_times
 
 
 def load_routes_info(routes_path: Path) -> Dict[str, dict]:
@@ -77,15 +340,14 @@ def load_routes_info(routes_path: Path) -> Dict[str, dict]:
         Dictionary mapping route_id to route information
     """
     routes = {}
+    columns = ["route_id", "route_short_name", "route_long_name", "route_type"]
     try:
-        with routes_path.open(encoding="utf-8") as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                routes[row.get("route_id", "")] = {
-                    "route_short_name": row.get("route_short_name", ""),
-                    "route_long_name": row.get("route_long_name", ""),
-                    "route_type": row.get("route_type", "")
-                }
+        for route_id, short_name, long_name, route_type in read_columns(routes_path, columns):
+            routes[sys.intern(route_id)] = {
+                "route_short_name": short_name,
+                "route_long_name": long_name,
+                "route_type": route_type
+            }
     except FileNotFoundError:
         pass
     return routes
@@ -101,38 +363,203 @@ def load_trips_info(trips_path: Path) -> Dict[str, dict]:
         Dictionary mapping trip_id to trip information including route_id
     """
     trip_routes = {}
+    columns = ["trip_id", "route_id", "service_id", "trip_headsign", "trip_short_name"]
     try:
-        with trips_path.open(encoding="utf-8") as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                trip_routes[row.get("trip_id", "")] = {
-                    "route_id": row.get("route_id", ""),
-                    "service_id": row.get("service_id", ""),
-                    "trip_headsign": row.get("trip_headsign", ""),
-                    "trip_short_name": row.get("trip_short_name", "")
-                }
+        for trip_id, route_id, service_id, headsign, short_name in read_columns(trips_path, columns):
+            trip_routes[sys.intern(trip_id)] = {
+                "route_id": sys.intern(route_id),
+                "service_id": sys.intern(service_id),
+                "trip_headsign": headsign,
+                "trip_short_name": short_name
+            }
     except FileNotFoundError:
         pass
     return trip_routes
 
 
-def load_calendar_dates(calendar_dates_path: Path) -> Dict[str, List[str]]:
+def load_calendar_dates(calendar_dates_path: Path) -> Dict[str, Set[str]]:
     """Load service dates from GTFS calendar_dates.csv file.
     
+    The result is indexed by date, so finding the services running on a
+    day is a single lookup instead of a scan over every service.
+    
     Args:
         calendar_dates_path: Path to calendar_dates.csv file
         
     Returns:
-        Dictionary mapping service_id to list of dates (YYYYMMDD)
+        Dictionary mapping each date (YYYYMMDD) to the set of service_ids
+        running on it
     """
-    service_dates = defaultdict(list)
+    services_by_date = defaultdict(set)
+    columns = ["service_id", "date", "exception_type"]
     try:
-        with calendar_dates_path.open(encoding="utf-8") as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                # exception_type 1 means service is added for this date
-                if row.get("exception_type") == "1":
-                    service_dates[row["service_id"]].append(row["date"])
+        for service_id, date, exception_type in read_columns(calendar_dates_path, columns):
+            # exception_type 1 means service is added for this date
+            if exception_type == "1":
+                services_by_date[date].add(sys.intern(service_id))
     except FileNotFoundError:
         pass
-    return service_dates
+    return services_by_date
+
+
+class StopNameIndex:
+    """Lowercased stop names, prepared once for resolving typed station names.
+    
+    Lookups try an exact (case-insensitive) name first, then a name prefix
+    via binary search over the sorted names, then a substring match. The
+    substring match only checks names sharing every trigram of the query.
+    """
+
+    def __init__(self, stops: Dict[str, Stop]):
+        self.names = sorted((stop.name.lower(), stop.stop_id) for stop in stops.values())
+        self.keys = [name for name, _ in self.names]
+        self.exact: Dict[str, str] = {}
+        self.trigrams: Dict[str, Set[int]] = defaultdict(set)
+        for i, (name, stop_id) in enumerate(self.names):
+            self.exact.setdefault(name, stop_id)
+            for j in range(len(name) - 2):
+                self.trigrams[name[j:j + 3]].add(i)
+
+    def _substring_candidates(self, q: str) -> Iterable[int]:
+        """Indices into names that may contain q, in name order."""
+        if len(q) < 3:
+            return range(len(self.names))
+        postings = sorted((self.trigrams.get(q[j:j + 3], set()) for j in range(len(q) - 2)), key=len)
+        return sorted(postings[0].intersection(*postings[1:]))
+
+    def lookup(self, query: str) -> Optional[str]:
+        """Return the stop_id whose name best matches query, or None."""
+        q = query.strip().lower()
+        if not q:
+            return None
+        if q in self.exact:
+            return self.exact[q]
+        i = bisect_left(self.keys, q)
+        if i < len(self.keys) and self.keys[i].startswith(q):
+            return self.names[i][1]
+        for i in self._substring_candidates(q):
+            name, stop_id = self.names[i]
+            if q in name:
+                return stop_id
+        return None
+
+
+class GTFSData(NamedTuple):
+    stops: Dict[str, Stop]
+    trips: StopTimes
+    routes: Dict[str, dict]
+    trip_routes: Dict[str, dict]
+    stop_names: StopNameIndex
+    services_by_date: Dict[str, Set[str]]
+    # date -> routing timetable, filled in by routing.get_timetable; kept on the
+    # feed so reloading a changed feed drops the timetables built from it
+    timetables: OrderedDict
+
+
+GTFS_ROUTING_FILES = ("stops.csv", "stop_times.csv", "routes.csv", "trips.csv", "calendar_dates.csv")
+# Parsed tables are pickled here rather than next to the feed, which the web app serves
+GTFS_CACHE_DIR = Path(__file__).resolve().parent / ".cache"
+# The pickles hold GTFSData and its parts, all defined here, so any edit to this
+# module invalidates them instead of relying on a hand-bumped version number
+GTFS_CACHE_VERSION = hashlib.sha1(Path(__file__).read_bytes()).hexdigest()
+
+# data_dir -> (modification times of its files, parsed tables)
+_GTFS_CACHE: Dict[Path, Tuple[Tuple[Optional[int], ...], GTFSData]] = {}
+
+
+def source_paths(data_dir: Path) -> Tuple[Path, ...]:
+    """The routing CSVs and their (possibly absent) Parquet copies."""
+    return tuple(
+        path
+        for name in GTFS_ROUTING_FILES
+        for path in (data_dir / name, (data_dir / name).with_suffix(".parquet"))
+    )
+
+
+def source_mtimes(data_dir: Path) -> Tuple[Optional[int], ...]:
+    """Modification times of the routing CSVs and their Parquet copies (None if absent)."""
+    mtimes = []
+    for path in source_paths(data_dir):
+        try:
+            mtimes.append(path.stat().st_mtime_ns)
+        except FileNotFoundError:
+            mtimes.append(None)
+    return tuple(mtimes)
+
+
+def _read_gtfs_cache(cache_path: Path, mtimes: Tuple[Optional[int], ...]) -> Optional[GTFSData]:
+    """Return the pickled tables if they were parsed from files with these mtimes."""
+    try:
+        with open(cache_path, "rb") as f:
+            version, cached_mtimes, data = pickle.load(f)
+    except Exception:
+        return None  # missing, truncated or written by other code: a cache miss
+    if version != GTFS_CACHE_VERSION or cached_mtimes != mtimes:
+        return None
+    return data
+
+
+def dump_pickle_atomic(obj, path: Path) -> None:
+    """Pickle obj to path through a temporary file in the same directory.
+    
+    Each writer uses its own temporary file, so processes writing the same
+    path at once never interleave writes before the atomic replace. The
+    temporary file is removed if pickling or the replace fails.
+    """
+    tmp_file = tempfile.NamedTemporaryFile(dir=path.parent, prefix=path.stem, suffix=".tmp", delete=False)
+    tmp_path = Path(tmp_file.name)
+    try:
+        with tmp_file:
+            pickle.dump(obj, tmp_file, protocol=pickle.HIGHEST_PROTOCOL)
+        tmp_path.replace(path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+
+def _write_gtfs_cache(cache_path: Path, mtimes: Tuple[Optional[int], ...], data: GTFSData) -> None:
+    """Pickle the parsed tables; an unwritable cache directory just goes uncached."""
+    try:
+        cache_path.parent.mkdir(exist_ok=True)
+        dump_pickle_atomic((GTFS_CACHE_VERSION, mtimes, data), cache_path)
+    except OSError:
+        pass
+
+
+def load_gtfs(data_dir: Path) -> GTFSData:
+    """Load the GTFS tables used for routing, parsing each data directory once.
+    
+    The parsed tables are kept for the lifetime of the process, so repeated
+    calls (e.g. one per API request) return the same objects. They are parsed
+    again only when one of the source files has been modified since. Parsed
+    tables are also pickled to GTFS_CACHE_DIR, so a new process can skip
+    parsing an unchanged feed.
+    
+    Args:
+        data_dir: Directory containing the GTFS CSV files
+        
+    Returns:
+        GTFSData with stops, stop times, routes, trip information, the
+        stop name index and the services running on each date
+    """
+    mtimes = source_mtimes(data_dir)
+    cached = _GTFS_CACHE.get(data_dir)
+    if cached is not None and cached[0] == mtimes:
+        return cached[1]
+    key = hashlib.sha1(str(data_dir.resolve()).encode()).hexdigest()[:16]
+    cache_path = GTFS_CACHE_DIR / f"gtfs_{key}.pkl"
+    data = _read_gtfs_cache(cache_path, mtimes)
+    if data is None:
+        stops = load_stops(data_dir / "stops.csv")
+        data = GTFSData(
+            stops=stops,
+            trips=load_stop_times_by_trip(data_dir / "stop_times.csv"),
+            routes=load_routes_info(data_dir / "routes.csv"),
+            trip_routes=load_trips_info(data_dir / "trips.csv"),
+            stop_names=StopNameIndex(stops),
+            services_by_date=load_calendar_dates(data_dir / "calendar_dates.csv"),
+            timetables=OrderedDict(),
+        )
+        _write_gtfs_cache(cache_path, mtimes, data)
+    _GTFS_CACHE[data_dir] = (mtimes, data)
+    return data
@@ -8,14 +8,21 @@ Handles transfers between different trips at common stops.
 
 from __future__ import annotations
 
-import csv
+import hashlib
+import pickle
+import sys
+from bisect import bisect_left, bisect_right
 from collections import defaultdict
-from dataclasses import dataclass
+from dataclasses import dataclass, fields
+from functools import lru_cache
+from operator import attrgetter, itemgetter, sub
 from pathlib import Path
 from typing import Dict, List, Optional, Set, Tuple
 
+from loading import dump_pickle_atomic, read_columns
 
-@dataclass
+
+@dataclass(slots=True)
 class TripConnection:
     """Represents a connection within a single trip between consecutive stops."""
     trip_id: str
@@ -27,8 +34,10 @@ class TripConnection:
     duration: int        # travel time in minutes
     from_sequence: int   # stop sequence number
     to_sequence: int     # stop sequence number
+    departure_min: int   # departure_time in minutes since midnight
+    arrival_min: int     # arrival_time in minutes since midnight
 
-@dataclass
+@dataclass(slots=True)
 class Transfer:
     """Represents a possible transfer between two trips at a stop."""
     stop_id: str
@@ -39,9 +48,21 @@ class Transfer:
     arrival_time: str    # When you arrive on from_trip
     departure_time: str  # When you depart on to_trip
     transfer_time: int   # Minutes needed for transfer
+    arrival_min: int     # arrival_time in minutes since midnight
+    departure_min: int   # departure_time in minutes since midnight
 
+@lru_cache(maxsize=None)
 def parse_time_to_minutes(time_str: str) -> int:
     """Convert HH:MM:SS to minutes since midnight."""
+    # Fast path for the canonical zero-padded layout used by GTFS feeds
+    if len(time_str) == 8 and time_str[2] == ':' and time_str[5] == ':':
+        digits = time_str[:2] + time_str[3:5] + time_str[6:]
+        if digits.isascii() and digits.isdigit():
+            hours = (ord(digits[0]) - 48) * 10 + ord(digits[1]) - 48
+            minutes = (ord(digits[2]) - 48) * 10 + ord(digits[3]) - 48
+            seconds = (ord(digits[4]) - 48) * 10 + ord(digits[5]) - 48
+            return (hours % 24) * 60 + minutes + seconds // 60
+    
     if not time_str or time_str.strip() == "":
         return 0
     
@@ -69,40 +90,50 @@ def minutes_to_time_str(minutes: int) -> str:
     return f"{hours:02d}:{mins:02d}"
 
 def load_gtfs_data(data_dir: Path) -> Tuple[Dict, Dict, Dict, Dict]:
-    """Load all necessary GTFS data."""
+    """Load all necessary GTFS data.
+    
+    Only the fields used downstream are kept: stops map stop_id to stop_name,
+    routes map route_id to route_short_name, trips map trip_id to route_id,
+    and stop times are (stop_id, stop_sequence, departure_time, arrival_time,
+    departure_min, arrival_min) tuples grouped by trip and sorted by sequence.
+    Times are parsed to minutes here, once per distinct string.
+    """
     print("Loading GTFS data...")
     
+    # Ids are interned so every connection, transfer and object set shares
+    # one string object per id
+    intern = sys.intern
+    
     # Load stops
-    stops = {}
-    with open(data_dir / "stops.csv", 'r', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            stops[row['stop_id']] = row
+    stops = {
+        intern(stop_id): name
+        for stop_id, name in read_columns(data_dir / "stops.csv", ['stop_id', 'stop_name'])
+    }
     
     # Load routes
-    routes = {}
-    with open(data_dir / "routes.csv", 'r', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            routes[row['route_id']] = row
+    routes = {
+        intern(route_id): name
+        for route_id, name in read_columns(data_dir / "routes.csv", ['route_id', 'route_short_name'])
+    }
     
     # Load trips
-    trips = {}
-    with open(data_dir / "trips.csv", 'r', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            trips[row['trip_id']] = row
+    trips = {
+        intern(trip_id): intern(route_id)
+        for trip_id, route_id in read_columns(data_dir / "trips.csv", ['trip_id', 'route_id'])
+    }
     
     # Load stop times organized by trip
     stop_times_by_trip = defaultdict(list)
-    with open(data_dir / "stop_times.csv", 'r', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            stop_times_by_trip[row['trip_id']].append(row)
+    columns = ['trip_id', 'stop_id', 'stop_sequence', 'departure_time', 'arrival_time']
+    for trip_id, stop_id, sequence, dep_time, arr_time in read_columns(data_dir / "stop_times.csv", columns):
+        stop_times_by_trip[intern(trip_id)].append((
+            intern(stop_id), int(sequence or 0), dep_time, arr_time,
+            parse_time_to_minutes(dep_time), parse_time_to_minutes(arr_time)
+        ))
     
     # Sort stop times by sequence
-    for trip_id in stop_times_by_trip:
-        stop_times_by_trip[trip_id].sort(key=lambda x: int(x.get('stop_sequence', 0)))
+    for stop_times in stop_times_by_trip.values():
+        stop_times.sort(key=itemgetter(1))
     
     print(f"Loaded {len(stops)} stops, {len(routes)} routes, {len(trips)} trips")
     
@@ -111,39 +142,39 @@ def load_gtfs_data(data_dir: Path) -> Tuple[Dict, Dict, Dict, Dict]:
 def extract_trip_connections(stops: Dict, routes: Dict, trips: Dict, stop_times_by_trip: Dict) -> List[TripConnection]:
     """Extract all connections within trips."""
     connections = []
+    # Bind hot-loop callables to locals once
+    append = connections.append
+    route_of = trips.get
     
     for trip_id, stop_times in stop_times_by_trip.items():
-        trip_info = trips.get(trip_id, {})
-        route_id = trip_info.get('route_id', 'unknown')
+        route_id = route_of(trip_id, 'unknown')
+        
+        if len(stop_times) < 2:
+            continue
+        
+        # Split the trip into columns and compute every leg duration in one pass
+        stop_ids, sequences, dep_times, arr_times, dep_minutes, arr_minutes = zip(*stop_times)
+        durations = list(map(sub, arr_minutes[1:], dep_minutes[:-1]))
         
         # Create connections between consecutive stops in this trip
-        for i in range(len(stop_times) - 1):
-            current_stop = stop_times[i]
-            next_stop = stop_times[i + 1]
+        for i, duration in enumerate(durations):
+            # Skip missing times and invalid durations
+            if duration <= 0 or not dep_times[i] or not arr_times[i + 1]:
+                continue
             
-            dep_time = current_stop.get("departure_time", "")
-            arr_time = next_stop.get("arrival_time", "")
-            
-            if dep_time and arr_time:
-                dep_minutes = parse_time_to_minutes(dep_time)
-                arr_minutes = parse_time_to_minutes(arr_time)
-                duration = arr_minutes - dep_minutes
-                
-                # Skip invalid durations
-                if duration <= 0:
-                    continue
-                
-                connections.append(TripConnection(
-                    trip_id=trip_id,
-                    route_id=route_id,
-                    from_stop=current_stop["stop_id"],
-                    to_stop=next_stop["stop_id"],
-                    departure_time=dep_time,
-                    arrival_time=arr_time,
-                    duration=duration,
-                    from_sequence=int(current_stop.get("stop_sequence", 0)),
-                    to_sequence=int(next_stop.get("stop_sequence", 0))
-                ))
+            append(TripConnection(
+                trip_id=trip_id,
+                route_id=route_id,
+                from_stop=stop_ids[i],
+                to_stop=stop_ids[i + 1],
+                departure_time=dep_times[i],
+                arrival_time=arr_times[i + 1],
+                duration=duration,
+                from_sequence=sequences[i],
+                to_sequence=sequences[i + 1],
+                departure_min=dep_minutes[i],
+                arrival_min=arr_minutes[i + 1]
+            ))
     
     print(f"Extracted {len(connections)} trip connections")
     return connections
@@ -151,56 +182,112 @@ def extract_trip_connections(stops: Dict, routes: Dict, trips: Dict, stop_times_
 def extract_transfers(stops: Dict, trips: Dict, stop_times_by_trip: Dict, min_transfer_time: int = 5) -> List[Transfer]:
     """Extract possible transfers between different trips at common stops."""
     transfers = []
+    # Bind hot-loop callables to locals once
+    append = transfers.append
+    route_of = trips.get
     
     # Group arrivals and departures by stop
-    arrivals_by_stop = defaultdict(list)  # stop_id -> [(trip_id, route_id, arrival_time)]
-    departures_by_stop = defaultdict(list)  # stop_id -> [(trip_id, route_id, departure_time)]
+    arrivals_by_stop = defaultdict(list)  # stop_id -> [(trip_id, route_id, arrival_time, arrival_min)]
+    departures_by_stop = defaultdict(list)  # stop_id -> [(trip_id, route_id, departure_time, departure_min)]
     
     for trip_id, stop_times in stop_times_by_trip.items():
-        trip_info = trips.get(trip_id, {})
-        route_id = trip_info.get('route_id', 'unknown')
+        route_id = route_of(trip_id, 'unknown')
         
-        for stop_time in stop_times:
-            stop_id = stop_time['stop_id']
-            arr_time = stop_time.get('arrival_time', '')
-            dep_time = stop_time.get('departure_time', '')
-            
+        for stop_id, _, dep_time, arr_time, dep_minutes, arr_minutes in stop_times:
             if arr_time:
-                arrivals_by_stop[stop_id].append((trip_id, route_id, arr_time))
+                arrivals_by_stop[stop_id].append((trip_id, route_id, arr_time, arr_minutes))
             if dep_time:
-                departures_by_stop[stop_id].append((trip_id, route_id, dep_time))
+                departures_by_stop[stop_id].append((trip_id, route_id, dep_time, dep_minutes))
     
     # Find valid transfers at each stop
     for stop_id in stops.keys():
-        arrivals = arrivals_by_stop.get(stop_id, [])
-        departures = departures_by_stop.get(stop_id, [])
+        arrivals = arrivals_by_stop.get(stop_id)
+        departures = departures_by_stop.get(stop_id)
+        if not arrivals or not departures:
+            continue
+        
+        # Departure positions sorted by time, so each arrival only visits the
+        # departures inside its [min_transfer_time, 120] minute window
+        order = sorted(range(len(departures)), key=lambda j: departures[j][3])
+        order_minutes = [departures[j][3] for j in order]
         
-        for from_trip, from_route, arr_time in arrivals:
-            for to_trip, to_route, dep_time in departures:
+        for from_trip, from_route, arr_time, arr_minutes in arrivals:
+            lo = bisect_left(order_minutes, arr_minutes + min_transfer_time)
+            hi = bisect_right(order_minutes, arr_minutes + 120)  # Max 2 hours wait
+            # Visit the window in original order to keep transfer numbering stable
+            for j in sorted(order[lo:hi]):
+                to_trip, to_route, dep_time, dep_minutes = departures[j]
                 # Skip same trip
                 if from_trip == to_trip:
                     continue
                 
-                arr_minutes = parse_time_to_minutes(arr_time)
-                dep_minutes = parse_time_to_minutes(dep_time)
                 transfer_time = dep_minutes - arr_minutes
-                
-                # Valid transfer: enough time but not too long
-                if min_transfer_time <= transfer_time <= 120:  # Max 2 hours wait
-                    transfers.append(Transfer(
-                        stop_id=stop_id,
-                        from_trip=from_trip,
-                        to_trip=to_trip,
-                        from_route=from_route,
-                        to_route=to_route,
-                        arrival_time=arr_time,
-                        departure_time=dep_time,
-                        transfer_time=transfer_time
-                    ))
+                append(Transfer(
+                    stop_id=stop_id,
+                    from_trip=from_trip,
+                    to_trip=to_trip,
+                    from_route=from_route,
+                    to_route=to_route,
+                    arrival_time=arr_time,
+                    departure_time=dep_time,
+                    transfer_time=transfer_time,
+                    arrival_min=arr_minutes,
+                    departure_min=dep_minutes
+                ))
     
     print(f"Found {len(transfers)} possible transfers")
     return transfers
 
+GTFS_INPUT_FILES = ("stops", "routes", "trips", "stop_times")
+NETWORK_CACHE_VERSION = 1  # bump when the extracted connections or transfers change
+
+# Connections and transfers are cached as plain tuples, so the pickle does not
+# depend on the module name (e.g. __main__) that defined the dataclasses
+_connection_row = attrgetter(*(f.name for f in fields(TripConnection)))
+_transfer_row = attrgetter(*(f.name for f in fields(Transfer)))
+
+def load_network_cached(data_dir: Path, cache_dir: Path) -> Tuple[Dict, Dict, Dict, List[TripConnection], List[Transfer]]:
+    """Load GTFS data and extract connections and transfers, reusing a pickle cache.
+    
+    The cache file is keyed by NETWORK_CACHE_VERSION and the size and mtime of
+    the GTFS inputs (and any Parquet copies of them), so editing or
+    regenerating the feed invalidates it. Only the newest cache file is kept,
+    and an unreadable one is rebuilt.
+    """
+    sources = [data_dir / f"{name}{suffix}" for name in GTFS_INPUT_FILES for suffix in (".csv", ".parquet")]
+    signature = [(p.name, p.stat().st_size, p.stat().st_mtime_ns) for p in sources if p.exists()]
+    key = hashlib.sha1(repr((NETWORK_CACHE_VERSION, signature)).encode()).hexdigest()[:16]
+    cache_path = cache_dir / f"gtfs_cache_{key}.pkl"
+    
+    if cache_path.exists():
+        try:
+            with open(cache_path, 'rb') as f:
+                stops, routes, trips, connection_rows, transfer_rows = pickle.load(f)
+            network = (
+                stops, routes, trips,
+                [TripConnection(*row) for row in connection_rows],
+                [Transfer(*row) for row in transfer_rows],
+            )
+        except Exception:
+            pass  # corrupt or written by other code; rebuild it below
+        else:
+            print(f"Loading cached connections from {cache_path}")
+            return network
+    
+    stops, routes, trips, stop_times_by_trip = load_gtfs_data(data_dir)
+    connections = extract_trip_connections(stops, routes, trips, stop_times_by_trip)
+    transfers = extract_transfers(stops, trips, stop_times_by_trip)
+    network = (stops, routes, trips, connections, transfers)
+    
+    rows = (stops, routes, trips, list(map(_connection_row, connections)), list(map(_transfer_row, transfers)))
+    dump_pickle_atomic(rows, cache_path)
+    # Drop caches of earlier feed versions
+    for stale in cache_dir.glob("gtfs_cache_*.pkl"):
+        if stale != cache_path:
+            stale.unlink(missing_ok=True)
+    
+    return network
+
 def generate_pddl_domain(output_path: Path) -> None:
     """Generate PDDL domain file for train journey planning with transfers."""
     
@@ -284,8 +371,7 @@ def generate_pddl_domain(output_path: Path) -> None:
     )
 )"""
     
-    with open(output_path, 'w') as f:
-        f.write(domain_content)
+    output_path.write_text(domain_content, encoding='utf-8')
 
 def generate_pddl_problem(
     connections: List[TripConnection],
@@ -297,44 +383,51 @@ def generate_pddl_problem(
     routes: Dict,
     trips: Dict,
     output_path: Path
-) -> None:
-    """Generate PDDL problem file for a specific journey with transfers."""
+) -> Tuple[int, int]:
+    """Generate PDDL problem file for a specific journey with transfers.
+    
+    Returns:
+        Number of relevant connections and transfers written to the problem
+    """
     
     start_minutes = parse_time_to_minutes(start_time)
     
-    # Extract unique objects
+    # Filter relevant connections (after start time)
+    relevant_connections = []
+    for i, conn in enumerate(connections):
+        if conn.departure_min >= start_minutes:
+            relevant_connections.append((conn, f"conn-{i}"))
+    
+    # Filter relevant transfers
+    relevant_transfers = []
+    for i, trans in enumerate(transfers):
+        if trans.departure_min >= start_minutes:
+            relevant_transfers.append((trans, f"trans-{i}"))
+    
+    # Extract unique objects from the relevant subset only
     all_stops = set([origin_stop, destination_stop])
     all_trips = set()
     all_routes = set()
     
-    for conn in connections:
+    for conn, _ in relevant_connections:
         all_stops.add(conn.from_stop)
         all_stops.add(conn.to_stop)
         all_trips.add(conn.trip_id)
         all_routes.add(conn.route_id)
     
-    for trans in transfers:
+    for trans, _ in relevant_transfers:
         all_stops.add(trans.stop_id)
         all_trips.add(trans.from_trip)
         all_trips.add(trans.to_trip)
         all_routes.add(trans.from_route)
         all_routes.add(trans.to_route)
     
-    # Filter relevant connections (after start time)
-    relevant_connections = []
-    for i, conn in enumerate(connections):
-        dep_minutes = parse_time_to_minutes(conn.departure_time)
-        if dep_minutes >= start_minutes:
-            relevant_connections.append((conn, f"conn-{i}"))
-    
-    # Filter relevant transfers
-    relevant_transfers = []
-    for i, trans in enumerate(transfers):
-        dep_minutes = parse_time_to_minutes(trans.departure_time)
-        if dep_minutes >= start_minutes:
-            relevant_transfers.append((trans, f"trans-{i}"))
+    # PDDL-safe trip names, computed once per trip rather than per emission
+    clean_trip = {trip: trip.replace("-", "_") for trip in all_trips}
     
-    problem_content = f"""(define (problem train-journey-problem)
+    with output_path.open('w', encoding='utf-8') as f:
+        write = f.write
+        write(f"""(define (problem train-journey-problem)
     (:domain train-journey-with-transfers)
     
     (:objects
@@ -342,7 +435,7 @@ def generate_pddl_problem(
         {' '.join(f'stop-{stop}' for stop in sorted(all_stops))} - stop
         
         ;; Trips
-        {' '.join(f'trip-{trip.replace("-", "_")}' for trip in sorted(all_trips))} - trip
+        {' '.join(f'trip-{clean_trip[trip]}' for trip in sorted(all_trips))} - trip
         
         ;; Routes
         {' '.join(f'route-{route}' for route in sorted(all_routes))} - route
@@ -359,44 +452,37 @@ def generate_pddl_problem(
         (passenger-at stop-{origin_stop})
         
         ;; Connection definitions
-"""
-    
-    # Add connection definitions and timed availability
-    for conn, conn_id in relevant_connections:
-        trip_clean = conn.trip_id.replace("-", "_")
-        problem_content += f"        (connection-trip {conn_id} trip-{trip_clean})\n"
-        problem_content += f"        (connection-route {conn_id} route-{conn.route_id})\n"
-        problem_content += f"        (connection-from {conn_id} stop-{conn.from_stop})\n"
-        problem_content += f"        (connection-to {conn_id} stop-{conn.to_stop})\n"
-        
-        # Make connection available at departure time
-        dep_minutes = parse_time_to_minutes(conn.departure_time)
-        relative_time = dep_minutes - start_minutes
-        
-        if relative_time >= 0:
-            problem_content += f"        (at {relative_time} (connection-available {conn_id}))\n"
-            # Connection window closes after departure
-            problem_content += f"        (at {relative_time + 1} (not (connection-available {conn_id})))\n"
-    
-    problem_content += "\n        ;; Transfer definitions\n"
-    
-    # Add transfer definitions and timed availability
-    for trans, trans_id in relevant_transfers:
-        from_trip_clean = trans.from_trip.replace("-", "_")
-        to_trip_clean = trans.to_trip.replace("-", "_")
-        problem_content += f"        (transfer-stop {trans_id} stop-{trans.stop_id})\n"
-        problem_content += f"        (transfer-from-trip {trans_id} trip-{from_trip_clean})\n"
-        problem_content += f"        (transfer-to-trip {trans_id} trip-{to_trip_clean})\n"
-        
-        # Transfer available when the connecting trip departs
-        dep_minutes = parse_time_to_minutes(trans.departure_time)
-        relative_time = dep_minutes - start_minutes
-        
-        if relative_time >= 0:
-            problem_content += f"        (at {relative_time} (transfer-available {trans_id}))\n"
-            problem_content += f"        (at {relative_time + 1} (not (transfer-available {trans_id})))\n"
-    
-    problem_content += f"""
+""")
+    
+        # Add connection definitions and timed availability. Relevant connections
+        # depart at or after the start time, so relative times are never negative;
+        # the window closes one minute after departure.
+        for conn, conn_id in relevant_connections:
+            relative_time = conn.departure_min - start_minutes
+            write(
+                f"        (connection-trip {conn_id} trip-{clean_trip[conn.trip_id]})\n"
+                f"        (connection-route {conn_id} route-{conn.route_id})\n"
+                f"        (connection-from {conn_id} stop-{conn.from_stop})\n"
+                f"        (connection-to {conn_id} stop-{conn.to_stop})\n"
+                f"        (at {relative_time} (connection-available {conn_id}))\n"
+                f"        (at {relative_time + 1} (not (connection-available {conn_id})))\n"
+            )
+    
+        write("\n        ;; Transfer definitions\n")
+    
+        # Add transfer definitions and timed availability, open when the
+        # connecting trip departs
+        for trans, trans_id in relevant_transfers:
+            relative_time = trans.departure_min - start_minutes
+            write(
+                f"        (transfer-stop {trans_id} stop-{trans.stop_id})\n"
+                f"        (transfer-from-trip {trans_id} trip-{clean_trip[trans.from_trip]})\n"
+                f"        (transfer-to-trip {trans_id} trip-{clean_trip[trans.to_trip]})\n"
+                f"        (at {relative_time} (transfer-available {trans_id}))\n"
+                f"        (at {relative_time + 1} (not (transfer-available {trans_id})))\n"
+            )
+    
+        write(f"""
     )
     
     (:goal
@@ -405,14 +491,14 @@ def generate_pddl_problem(
     
     ;; Minimize total time
     (:metric minimize (total-time))
-)"""
+)""")
     
-    # Now add durative action instances with specific durations
-    durative_actions = "\n;; Durative action instances\n"
+        # Now add durative action instances with specific durations
+        write("\n;; Durative action instances\n")
     
-    for conn, conn_id in relevant_connections:
-        trip_clean = conn.trip_id.replace("-", "_")
-        durative_actions += f"""
+        for conn, conn_id in relevant_connections:
+            trip_clean = clean_trip[conn.trip_id]
+            write(f"""
 (:durative-action take-{conn_id}
     :parameters ()
     :duration (= ?duration {conn.duration})
@@ -426,11 +512,11 @@ def generate_pddl_problem(
         (at start (not (connection-available {conn_id})))
         (at end (passenger-at stop-{conn.to_stop}))
     )
-)"""
+)""")
     
-    for trans, trans_id in relevant_transfers:
-        to_trip_clean = trans.to_trip.replace("-", "_")
-        durative_actions += f"""
+        for trans, trans_id in relevant_transfers:
+            to_trip_clean = clean_trip[trans.to_trip]
+            write(f"""
 (:durative-action make-{trans_id}
     :parameters ()
     :duration (= ?duration {trans.transfer_time})
@@ -443,28 +529,33 @@ def generate_pddl_problem(
         (at start (not (transfer-available {trans_id})))
         (at end (passenger-at stop-{trans.stop_id}))
     )
-)"""
+)""")
     
-    # Write problem with durative actions
-    full_content = problem_content + durative_actions + "\n)"
+        # Write problem with durative actions
+        write("\n)")
     
-    with open(output_path, 'w') as f:
-        f.write(full_content)
+    return len(relevant_connections), len(relevant_transfers)
 
 def gtfs_to_pddl(
     origin: str,
     destination: str,
     start_time: str = "08:00:00",
     data_dir: Path = Path("public/data"),
-    output_dir: Path = Path("pddl_output")
+    output_dir: Path = Path("pddl_output"),
+    network: Optional[Tuple] = None
 ) -> Tuple[Path, Path]:
     """
     Convert GTFS data to PDDL domain and problem files with transfer support.
+    
+    An already loaded network from load_network_cached can be passed in to
+    skip loading.
     """
     output_dir.mkdir(exist_ok=True)
     
-    # Load GTFS data
-    stops, routes, trips, stop_times_by_trip = load_gtfs_data(data_dir)
+    # Load GTFS data with its connections and transfers
+    if network is None:
+        network = load_network_cached(data_dir, output_dir)
+    stops, routes, trips, connections, transfers = network
     
     # Validate stops
     if origin not in stops:
@@ -472,10 +563,6 @@ def gtfs_to_pddl(
     if destination not in stops:
         raise ValueError(f"Destination stop not found: {destination}")
     
-    # Extract connections and transfers
-    connections = extract_trip_connections(stops, routes, trips, stop_times_by_trip)
-    transfers = extract_transfers(stops, trips, stop_times_by_trip)
-    
     # Generate PDDL files
     domain_file = output_dir / "train-domain.pddl"
     problem_file = output_dir / f"train-problem-{origin}-to-{destination}.pddl"
@@ -484,7 +571,7 @@ def gtfs_to_pddl(
     generate_pddl_domain(domain_file)
     
     print("Generating PDDL problem...")
-    generate_pddl_problem(
+    relevant_connections, relevant_transfers = generate_pddl_problem(
         connections,
         transfers,
         origin,
@@ -496,18 +583,11 @@ def gtfs_to_pddl(
         problem_file
     )
     
-    # Statistics
-    start_minutes = parse_time_to_minutes(start_time)
-    relevant_connections = sum(1 for conn in connections 
-                              if parse_time_to_minutes(conn.departure_time) >= start_minutes)
-    relevant_transfers = sum(1 for trans in transfers 
-                            if parse_time_to_minutes(trans.departure_time) >= start_minutes)
-    
     print(f"\nGenerated PDDL files:")
     print(f"Domain: {domain_file}")
     print(f"Problem: {problem_file}")
-    print(f"Origin: {stops[origin]['stop_name']} ({origin})")
-    print(f"Destination: {stops[destination]['stop_name']} ({destination})")
+    print(f"Origin: {stops[origin]} ({origin})")
+    print(f"Destination: {stops[destination]} ({destination})")
     print(f"Total connections: {len(connections)} (relevant: {relevant_connections})")
     print(f"Total transfers: {len(transfers)} (relevant: {relevant_transfers})")
     print(f"\nTo solve with OPTIC:")
@@ -562,8 +642,7 @@ def generate_simple_pddl_domain(output_path: Path) -> None:
     )
 )"""
     
-    with open(output_path, 'w') as f:
-        f.write(domain_content)
+    output_path.write_text(domain_content, encoding='utf-8')
 
 def generate_simple_pddl_problem(
     connections: List[TripConnection],
@@ -581,7 +660,7 @@ def generate_simple_pddl_problem(
     # Filter and limit connections for testing
     relevant_connections = []
     for conn in connections:
-        dep_minutes = parse_time_to_minutes(conn.departure_time)
+        dep_minutes = conn.departure_min
         if dep_minutes >= start_minutes and len(relevant_connections) < max_connections:
             # Only include connections involving our origin/destination or nearby stops
             if (conn.from_stop == origin_stop or conn.to_stop == destination_stop or 
@@ -591,7 +670,7 @@ def generate_simple_pddl_problem(
     # If we don't have direct connections, add some more
     if len(relevant_connections) < 10:
         for conn in connections:
-            dep_minutes = parse_time_to_minutes(conn.departure_time)
+            dep_minutes = conn.departure_min
             if dep_minutes >= start_minutes and len(relevant_connections) < max_connections:
                 relevant_connections.append(conn)
     
@@ -604,15 +683,23 @@ def generate_simple_pddl_problem(
         all_stops.add(conn.to_stop)
         all_trips.add(conn.trip_id)
     
-    problem_content = f"""(define (problem simple-train-problem)
+    clean_trip = {trip: trip.replace("-", "_") for trip in all_trips}
+    
+    # Declare at most 20 stops and 20 trips
+    selected_stops = sorted(all_stops)[:20]
+    selected_trips = sorted(all_trips)[:20]
+    declared_stops = set(selected_stops)
+    declared_trips = set(selected_trips)
+    
+    header = f"""(define (problem simple-train-problem)
     (:domain simple-train-journey)
     
     (:objects
         ;; Stops (limited set)
-        {' '.join(f'stop_{stop}' for stop in sorted(list(all_stops)[:20]))} - stop
+        {' '.join(f'stop_{stop}' for stop in selected_stops)} - stop
         
         ;; Trips (limited set)
-        {' '.join(f'trip_{trip.replace("-", "_")}' for trip in sorted(list(all_trips)[:20]))} - trip
+        {' '.join(f'trip_{clean_trip[trip]}' for trip in selected_trips)} - trip
     )
     
     (:init
@@ -621,21 +708,24 @@ def generate_simple_pddl_problem(
         
         ;; Trip connections
 """
+    with output_path.open('w', encoding='utf-8') as f:
+        write = f.write
+        write(header)
 
-    # Add connections with travel times
-    for conn in relevant_connections:
-        trip_clean = conn.trip_id.replace("-", "_")
-        if f'trip_{trip_clean}' in problem_content and f'stop_{conn.from_stop}' in problem_content and f'stop_{conn.to_stop}' in problem_content:
-            problem_content += f"        (trip-connects trip_{trip_clean} stop_{conn.from_stop} stop_{conn.to_stop})\n"
-            problem_content += f"        (= (travel-time trip_{trip_clean} stop_{conn.from_stop} stop_{conn.to_stop}) {conn.duration})\n"
+        # Add connections with travel times (only between declared objects)
+        for conn in relevant_connections:
+            if conn.trip_id in declared_trips and conn.from_stop in declared_stops and conn.to_stop in declared_stops:
+                trip_clean = clean_trip[conn.trip_id]
+                write(f"        (trip-connects trip_{trip_clean} stop_{conn.from_stop} stop_{conn.to_stop})\n")
+                write(f"        (= (travel-time trip_{trip_clean} stop_{conn.from_stop} stop_{conn.to_stop}) {conn.duration})\n")
             
-            # Make trip available at departure time
-            dep_minutes = parse_time_to_minutes(conn.departure_time)
-            relative_time = dep_minutes - start_minutes
-            if relative_time >= 0:
-                problem_content += f"        (at {relative_time} (trip-available trip_{trip_clean} stop_{conn.from_stop}))\n"
+                # Make trip available at departure time
+                dep_minutes = conn.departure_min
+                relative_time = dep_minutes - start_minutes
+                if relative_time >= 0:
+                    write(f"        (at {relative_time} (trip-available trip_{trip_clean} stop_{conn.from_stop}))\n")
 
-    problem_content += f"""
+        write(f"""
     )
     
     (:goal
@@ -643,27 +733,24 @@ def generate_simple_pddl_problem(
     )
     
     (:metric minimize (total-time))
-)"""
-
-    with open(output_path, 'w') as f:
-        f.write(problem_content)
+)""")
 
 def create_test_pddl(
     origin: str = "830012810",
     destination: str = "830012852", 
     start_time: str = "08:00:00",
     data_dir: Path = Path("public/data"),
-    output_dir: Path = Path("pddl_test")
+    output_dir: Path = Path("pddl_test"),
+    network: Optional[Tuple] = None
 ) -> Tuple[Path, Path]:
-    """Create a small test PDDL problem."""
+    """Create a small test PDDL problem, optionally from an already loaded network."""
     
     output_dir.mkdir(exist_ok=True)
     
-    # Load minimal data
-    stops, routes, trips, stop_times_by_trip = load_gtfs_data(data_dir)
-    
-    # Extract only a subset of connections
-    connections = extract_trip_connections(stops, routes, trips, stop_times_by_trip)
+    # Load data and connections
+    if network is None:
+        network = load_network_cached(data_dir, output_dir)
+    stops, routes, trips, connections, _ = network
     
     print(f"Total connections in dataset: {len(connections)}")
     
@@ -698,44 +785,62 @@ def create_test_pddl(
 
 # Example usage and testing
 if __name__ == "__main__":
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Convert GTFS data to PDDL train journey problems.")
+    parser.add_argument("--mode", choices=["full", "test", "both"], default="both",
+                        help="full: transfer-aware problem, test: small problem, both: full then test")
+    parser.add_argument("--origin", default="830012810")       # CAGLIARI S.GILLA from your data
+    parser.add_argument("--destination", default="830012852")  # GOLFO ARANCI from your data
+    parser.add_argument("--start-time", default="08:00:00")
+    parser.add_argument("--data-dir", type=Path, default=Path("public/data"))
+    args = parser.parse_args()
+    
     try:
-        print("Converting GTFS to PDDL with transfer support...")
+        # Load the network once and share it between both outputs
+        output_dir = Path("pddl_output" if args.mode != "test" else "pddl_test")
+        output_dir.mkdir(exist_ok=True)
+        network = load_network_cached(args.data_dir, output_dir)
         
-        domain_file, problem_file = gtfs_to_pddl(
-            origin="830012810",      # CAGLIARI S.GILLA from your data
-            destination="830012852", # GOLFO ARANCI from your data
-            start_time="08:00:00"
-        )
+        if args.mode in ("full", "both"):
+            print("Converting GTFS to PDDL with transfer support...")
+            
+            domain_file, problem_file = gtfs_to_pddl(
+                origin=args.origin,
+                destination=args.destination,
+                start_time=args.start_time,
+                data_dir=args.data_dir,
+                network=network
+            )
+            
+            print(f"\nSample OPTIC commands:")
+            print(f"optic {domain_file} {problem_file}")
+            print(f"optic {domain_file} {problem_file} > solution.txt")
         
-        print(f"\nSample OPTIC commands:")
-        print(f"optic {domain_file} {problem_file}")
-        print(f"optic {domain_file} {problem_file} > solution.txt")
+        if args.mode in ("test", "both"):
+            print("Creating small test PDDL files...")
+            
+            domain_file, problem_file = create_test_pddl(
+                origin=args.origin,
+                destination=args.destination,
+                start_time=args.start_time,
+                data_dir=args.data_dir,
+                network=network
+            )
+            
+            print(f"\nTo test with OPTIC:")
+            print(f"optic {domain_file} {problem_file}")
+            
+            # Show the actual problem content (first 30 lines)
+            print(f"\nFirst 30 lines of problem file:")
+            with open(problem_file, 'r') as f:
+                for i, line in enumerate(f):
+                    if i < 30:
+                        print(f"{i+1:2d}: {line.rstrip()}")
+                    else:
+                        break
         
     except Exception as e:
         print(f"Error: {e}")
         import traceback
         traceback.print_exc()
-
-# Test with very simple case
-if __name__ == "__main__":
-    try:
-        print("Creating small test PDDL files...")
-        
-        domain_file, problem_file = create_test_pddl()
-        
-        print(f"\nTo test with OPTIC:")
-        print(f"optic {domain_file} {problem_file}")
-        
-        # Show the actual problem content (first 50 lines)
-        print(f"\nFirst 30 lines of problem file:")
-        with open(problem_file, 'r') as f:
-            for i, line in enumerate(f):
-                if i < 30:
-                    print(f"{i+1:2d}: {line.rstrip()}")
-                else:
-                    break
-        
-    except Exception as e:
-        print(f"Error: {e}")
-        import traceback
-        traceback.print_exc()
\ No newline at end of file
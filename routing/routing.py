@@ -2,343 +2,433 @@ from __future__ import annotations
 
 import json
 import math
-from datetime import datetime, time
+import threading
+from bisect import bisect_left
+from dataclasses import dataclass, field
+from datetime import time
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, Iterable, List, Optional, Set, Tuple
 
-import networkx as nx
-from loading import (Stop, load_calendar_dates, load_routes_info,
-                     load_stop_times_by_trip, load_stops, load_trips_info)
+from loading import (GTFSData, Stop, StopNameIndex, StopTimes, load_gtfs,
+                     parse_time_to_seconds)
 
 DATA_DIR_DEFAULT = Path("public/data")
+MAX_ROUNDS = 8  # RAPTOR rounds, i.e. at most MAX_ROUNDS - 1 transfers
+SEARCH_HORIZON_SECS = 24 * 3600  # ignore departures more than a day after start_time
+MAX_CACHED_TIMETABLES = 8  # per feed; dates come from API queries, so keep only the recent ones
+MAX_SPEED_KMH = 300  # no train is faster, so distance / MAX_SPEED_KMH bounds travel time
+EARTH_RADIUS_KM = 6371.0
+BOUND_SLACK_SECS = 120  # GTFS times are rounded to the minute at both ends of a ride
 
-def parse_time_to_seconds(t: str) -> Optional[int]:
-    if not t or t.lower() == "nan":
-        return None
-    try:
-        dt = datetime.strptime(t.strip(), "%H:%M:%S")
-        return dt.hour * 3600 + dt.minute * 60 + dt.second
-    except ValueError:
-        return None
+# Guards the per-feed timetable LRU against concurrent requests
+_TIMETABLES_LOCK = threading.Lock()
+
+# One ride in a journey: (trip index, boarding position, alighting position)
+Leg = Tuple[int, int, int]
 
 def seconds_to_time(seconds: int) -> str:
     return str(time(seconds // 3600, (seconds % 3600) // 60, seconds % 60))
 
-def build_transit_graph(
-    stops: Dict[str, Stop],
-    trips: Dict[str, List[dict]],
-    routes: Dict[str, dict],
+
+@dataclass
+class RoutePattern:
+    """Trips that visit exactly the same sequence of stops.
+    
+    trips holds StopTimes trip indices ordered by departure, so position i
+    of any trip is row trip_offsets[trip] + i of the stop_times columns.
+    departures lets RAPTOR bisect for the first catchable trip at a stop.
+    """
+    stop_ids: Tuple[str, ...]
+    trips: List[int] = field(default_factory=list)
+    # Per position: ascending departure times of the trips that have one, and
+    # the index into trips of each of those departures
+    departures: List[List[int]] = field(default_factory=list)
+    departure_order: List[List[int]] = field(default_factory=list)
+
+
+@dataclass
+class Timetable:
+    """RAPTOR view of the trips running on one service date."""
+    patterns: List[RoutePattern]
+    routes_by_stop: Dict[str, List[Tuple[int, int]]]  # stop_id -> [(pattern index, position)]
+    # dest_id -> travel time lower bounds from every served stop, filled in by find_journey
+    travel_time_bounds: Dict[str, Dict[str, float]] = field(default_factory=dict)
+
+
+def _travel_time_bounds(stops: Dict[str, Stop], stop_ids: Iterable[str], dest_id: str) -> Dict[str, float]:
+    """Lower bound on the travel time in seconds from each stop to dest_id.
+    
+    The great-circle distance at MAX_SPEED_KMH, less BOUND_SLACK_SECS for
+    minute-rounded times, never overestimates a ride, so RAPTOR can drop
+    labels that cannot beat the best known arrival. Stops without coordinates
+    (blank fields load as 0.0, 0.0) get no bound.
+    """
+    dest = stops.get(dest_id)
+    if dest is None or not _has_coordinates(dest):
+        return {}
+    dest_lat, dest_lon = math.radians(dest.lat), math.radians(dest.lon)
+    secs_per_km = 3600 / MAX_SPEED_KMH
+    bounds = {}
+    for stop_id in stop_ids:
+        stop = stops.get(stop_id)
+        if stop is None or not _has_coordinates(stop):
+            continue
+        lat, lon = math.radians(stop.lat), math.radians(stop.lon)
+        a = math.sin((lat - dest_lat) / 2) ** 2 + math.cos(lat) * math.cos(dest_lat) * math.sin((lon - dest_lon) / 2) ** 2
+        distance_km = 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+        bounds[stop_id] = max(0.0, distance_km * secs_per_km - BOUND_SLACK_SECS)
+    return bounds
+
+
+def _has_coordinates(stop: Stop) -> bool:
+    return not (stop.lat == 0.0 and stop.lon == 0.0)
+
+
+def _first_departure(trips: StopTimes, trip_idx: int) -> int:
+    for row in trips.trip_rows(trip_idx):
+        if trips.departure_secs[row] >= 0:
+            return trips.departure_secs[row]
+    return -1
+
+
+def build_timetable(
+    trips: StopTimes,
     trip_routes: Dict[str, dict],
-    start_time_secs: int,
+    services_by_date: Dict[str, Set[str]],
     date: str
-) -> Tuple[nx.DiGraph, Dict[str, List[Tuple[str, int]]]]:
+) -> Timetable:
     """
-    Build a time-expanded graph for transit routing.
+    Group the trips running on date into route patterns for RAPTOR.
     
     Returns:
-        - NetworkX directed graph
-        - Dictionary mapping stop_id to list of (node_id, departure_time) for that stop
+        Timetable with the patterns and, for every stop, the patterns serving it
     """
-    G = nx.DiGraph()
-    stop_departures = {}  # stop_id -> [(node_id, departure_time)]
+    # Filter trips to only include those running on the specified date
+    active_service_ids = services_by_date.get(date, set())
     
-    for stop_id in stops:
-        stop_departures[stop_id] = []
+    patterns_by_stops: Dict[Tuple[str, ...], RoutePattern] = {}
+    active_trips = 0
+    for trip_idx, trip_id in enumerate(trips.trip_ids):
+        if trip_routes.get(trip_id, {}).get("service_id") not in active_service_ids:
+            continue
+        rows = trips.trip_rows(trip_idx)
+        stop_ids = tuple(trips.stop_ids[rows.start:rows.stop])
+        pattern = patterns_by_stops.get(stop_ids)
+        if pattern is None:
+            pattern = patterns_by_stops[stop_ids] = RoutePattern(stop_ids)
+        pattern.trips.append(trip_idx)
+        active_trips += 1
     
-    # Filter trips to only include those running on the specified date
-    calendar_dates_path = DATA_DIR_DEFAULT / "calendar_dates.csv"
-    service_dates = load_calendar_dates(calendar_dates_path)
+    patterns = list(patterns_by_stops.values())
+    routes_by_stop: Dict[str, List[Tuple[int, int]]] = {}
+    for pattern_idx, pattern in enumerate(patterns):
+        pattern.trips.sort(key=lambda trip_idx: _first_departure(trips, trip_idx))
+        for position, stop_id in enumerate(pattern.stop_ids):
+            routes_by_stop.setdefault(stop_id, []).append((pattern_idx, position))
+            column = sorted(
+                (departure, order)
+                for order, trip_idx in enumerate(pattern.trips)
+                if (departure := trips.departure_secs[trips.trip_offsets[trip_idx] + position]) >= 0
+            )
+            pattern.departures.append([departure for departure, _ in column])
+            pattern.departure_order.append([order for _, order in column])
     
-    # Get service_ids running on the given date
-    active_service_ids = {
-        service_id for service_id, dates in service_dates.items() if date in dates
-    }
+    print(f"Timetable for {date}: {active_trips} trips in {len(patterns)} route patterns out of {len(trips.trip_ids)} total trips")
+    return Timetable(patterns, routes_by_stop)
+
+
+def get_timetable(feed: GTFSData, date: str) -> Timetable:
+    """
+    Return the feed's timetable for date, building it on first use.
     
-    # Filter trips by active service_ids
-    date_relevant_trips = {
-        trip_id: stop_sequence
-        for trip_id, stop_sequence in trips.items()
-        if trip_routes.get(trip_id, {}).get("service_id") in active_service_ids
-    }
+    Building the patterns costs far more than a RAPTOR query, so queries on
+    the same feed and date share one timetable. The feed keeps the
+    MAX_CACHED_TIMETABLES most recently used dates in GTFSData.timetables.
+    The lookup, build and eviction run under a lock, so concurrent requests
+    neither corrupt the LRU nor build the same date twice.
+    """
+    timetables = feed.timetables
+    with _TIMETABLES_LOCK:
+        timetable = timetables.get(date)
+        if timetable is None:
+            timetable = timetables[date] = build_timetable(feed.trips, feed.trip_routes, feed.services_by_date, date)
+            while len(timetables) > MAX_CACHED_TIMETABLES:
+                timetables.popitem(last=False)
+        else:
+            timetables.move_to_end(date)
+        return timetable
+
+
+def raptor_earliest_arrival(
+    timetable: Timetable,
+    trips: StopTimes,
+    origin_id: str,
+    dest_id: str,
+    start_time_secs: int,
+    max_rounds: int = MAX_ROUNDS,
+    lower_bounds: Optional[Dict[str, float]] = None,
+    arrival_limit: float = math.inf
+) -> Optional[List[Leg]]:
+    """
+    Find the earliest arrival journey with RAPTOR.
     
-    # Filter trips to only include those with departures after start_time
-    relevant_trips = {}
-    for trip_id, stop_sequence in date_relevant_trips.items():
-        has_relevant_departure = any(
-            parse_time_to_seconds(stop_time.get("departure_time", "")) and
-            parse_time_to_seconds(stop_time.get("departure_time", "")) >= start_time_secs
-            for stop_time in stop_sequence
-        )
-        if has_relevant_departure:
-            relevant_trips[trip_id] = stop_sequence
+    Round k scans every pattern serving a stop improved in round k - 1 and
+    relaxes arrivals along the earliest trip catchable at each stop, so a
+    journey found in round k uses k trips. A stop is only improved if its
+    arrival plus its lower bound (seconds to dest_id) can still beat both
+    the best known arrival at dest_id and arrival_limit.
     
-    print(f"Processing {len(relevant_trips)} relevant trips for date {date} out of {len(trips)} total trips")
+    Returns:
+        The journey's legs in travel order, or None if dest_id is unreachable
+    """
+    arrival_secs = trips.arrival_secs
+    departure_secs = trips.departure_secs
+    trip_offsets = trips.trip_offsets
+    horizon = start_time_secs + SEARCH_HORIZON_SECS
+    bound = (lower_bounds or {}).get
     
-    # Add nodes and edges for each relevant trip
-    for trip_id, stop_sequence in relevant_trips.items():
-        trip_info = trip_routes.get(trip_id, {})
-        route_id = trip_info.get("route_id", "")
-        route_info = routes.get(route_id, {})
-        
-        prev_node_id = None
-        prev_arrival_time = None
-        
-        for idx, stop_time in enumerate(stop_sequence):
-            stop_id = stop_time["stop_id"]
-            arrival_secs = parse_time_to_seconds(stop_time.get("arrival_time", ""))
-            departure_secs = parse_time_to_seconds(stop_time.get("departure_time", ""))
-            
-            if arrival_secs is None or departure_secs is None:
-                continue
-                
-            # Only consider stops within a reasonable time window (e.g., 24 hours)
-            # to prevent the graph from becoming too large
-            if departure_secs > start_time_secs + 24 * 3600:  # Skip if more than 24 hours later
-                continue
-            
-            # Create unique node ID for this stop on this trip
-            node_id = f"{stop_id}_{trip_id}_{idx}"
-            
-            # Add node with attributes
-            G.add_node(node_id, 
-                      stop_id=stop_id,
-                      trip_id=trip_id,
-                      route_id=route_id,
-                      arrival_time=arrival_secs,
-                      departure_time=departure_secs,
-                      stop_sequence=idx,
-                      stop_name=stops.get(stop_id, Stop("", "", 0, 0)).name,
-                      route_name=route_info.get("route_short_name", route_id),
-                      route_description=route_info.get("route_long_name", ""),
-                      trip_headsign=trip_info.get("trip_headsign", ""),
-                      trip_short_name=trip_info.get("trip_short_name", ""),
-                      date=date)
-            
-            # Track departures from this stop
-            stop_departures[stop_id].append((node_id, departure_secs))
-            
-            # Add edge from previous stop on the same trip (in-vehicle travel)
-            if prev_node_id is not None and prev_arrival_time is not None:
-                travel_time = arrival_secs - prev_arrival_time
-                if travel_time >= 0:  # Allow zero-minute travel time
-                    G.add_edge(prev_node_id, node_id, 
-                              weight=travel_time,
-                              edge_type="in_vehicle",
-                              trip_id=trip_id)
-            
-            prev_node_id = node_id
-            prev_arrival_time = departure_secs
+    target = arrival_limit  # arrivals at dest_id must beat this
+    best = {origin_id: start_time_secs}  # earliest known arrival per stop
+    label_round = {origin_id: 0}  # round in which best[stop] was set
+    # parents[k][stop] = (trip index, pattern index, board position, alight position, board round)
+    parents: List[Dict[str, Tuple[int, int, int, int, int]]] = [{}]
+    marked = {origin_id}
     
-    # Add transfer edges between different trips at the same stop (optimized)
-    transfer_penalty = 600  # 1 minute penalty for each transfer
-    for stop_id, departures in stop_departures.items():
-        # Sort departures by time
-        departures.sort(key=lambda x: x[1])
+    for k in range(1, max_rounds + 1):
+        # Boarding uses labels from earlier rounds only
+        prev_best = dict(best)
+        prev_round = dict(label_round)
         
-        # Limit transfers: only connect to the next few departures to avoid exponential edges
-        MAX_TRANSFERS_PER_ARRIVAL = 2 
+        # Collect each pattern once, from the earliest marked position on it
+        queue: Dict[int, int] = {}
+        for stop_id in marked:
+            for pattern_idx, position in timetable.routes_by_stop.get(stop_id, ()):
+                if position < queue.get(pattern_idx, math.inf):
+                    queue[pattern_idx] = position
         
-        for i, (from_node, from_time) in enumerate(departures):
-            from_trip = G.nodes[from_node]["trip_id"]
-            from_arrival = G.nodes[from_node]["arrival_time"]
-            transfers_added = 0
+        marked = set()
+        round_parents: Dict[str, Tuple[int, int, int, int, int]] = {}
+        for pattern_idx, first_position in queue.items():
+            pattern = timetable.patterns[pattern_idx]
+            trip_idx = None
+            offset = board_position = board_round = 0
             
-            # Connect to next few departures from the same stop (transfers)
-            for j in range(i + 1, min(i + 1 + MAX_TRANSFERS_PER_ARRIVAL, len(departures))):
-                to_node, to_time = departures[j]
-                to_trip = G.nodes[to_node]["trip_id"]
+            for position in range(first_position, len(pattern.stop_ids)):
+                stop_id = pattern.stop_ids[position]
+                
+                # Ride the current trip to this stop, pruned by the best known destination arrival
+                if trip_idx is not None:
+                    arrival = arrival_secs[offset + position]
+                    if 0 <= arrival < best.get(stop_id, math.inf) and arrival + bound(stop_id, 0) < target:
+                        best[stop_id] = arrival
+                        if stop_id == dest_id:
+                            target = arrival
+                        label_round[stop_id] = k
+                        round_parents[stop_id] = (trip_idx, pattern_idx, board_position, position, board_round)
+                        marked.add(stop_id)
+                
+                # Switch to an earlier trip if this stop was reached in time for one
+                ready = prev_best.get(stop_id)
+                if ready is None:
+                    continue
+                current_departure = math.inf
+                if trip_idx is not None:
+                    current_departure = departure_secs[offset + position]
+                    if current_departure < 0 or ready > current_departure:
+                        continue
                 
-                # Only add transfer edge if different trips
-                if from_trip != to_trip:
-                    # The weight should be the waiting time plus the penalty
-                    wait_time = to_time - from_arrival
-                    if wait_time >= 0:
-                        G.add_edge(from_node, to_node,
-                                  weight=wait_time + transfer_penalty,
-                                  edge_type="transfer",
-                                  transfer_stop=stop_id)
-                        transfers_added += 1
-                        
-                        if transfers_added >= 2:  # Max 2 transfer options
-                            break
+                # Seek the first departure at or after the ready time
+                departures = pattern.departures[position]
+                i = bisect_left(departures, ready)
+                if i == len(departures) or departures[i] > horizon:
+                    continue
+                if departures[i] < current_departure:
+                    trip_idx = pattern.trips[pattern.departure_order[position][i]]
+                    offset = trip_offsets[trip_idx]
+                    board_position = position
+                    board_round = prev_round[stop_id]
+                elif prev_round[stop_id] <= board_round:
+                    # No earlier trip is catchable. Boarding the current trip here
+                    # instead avoids riding back over the previous leg, as long as
+                    # it does not need more rides to reach this stop.
+                    board_position = position
+                    board_round = prev_round[stop_id]
+        
+        parents.append(round_parents)
+        if not marked:
+            break
+    
+    if dest_id not in best or dest_id == origin_id:
+        return None
     
-    print(f"Graph built with {G.number_of_nodes()} nodes and {G.number_of_edges()} edges")
-    return G, stop_departures
+    # Walk the parent pointers back from the destination
+    legs: List[Leg] = []
+    stop_id, k = dest_id, label_round[dest_id]
+    while k > 0:
+        trip_idx, pattern_idx, board_position, alight_position, board_round = parents[k][stop_id]
+        legs.append((trip_idx, board_position, alight_position))
+        stop_id = timetable.patterns[pattern_idx].stop_ids[board_position]
+        k = board_round
+    legs.reverse()
+    return legs
+
 
+def _journey_arrival(legs: List[Leg], trips: StopTimes) -> int:
+    trip_idx, _, alight_position = legs[-1]
+    return trips.arrival_secs[trips.trip_offsets[trip_idx] + alight_position]
 
-def find_earliest_arrival_path(
-    G: nx.DiGraph,
-    stop_departures: Dict[str, List[Tuple[str, int]]],
+
+def find_journey(
+    timetable: Timetable,
+    trips: StopTimes,
     origin_id: str,
     dest_id: str,
-    start_time_secs: int
-) -> Optional[List[str]]:
-    """
-    Find the earliest arrival path using NetworkX shortest path.
+    start_time_secs: int,
+    stops: Optional[Dict[str, Stop]] = None
+) -> Optional[List[Leg]]:
     """
-    # Find all possible starting nodes (departures from origin after start_time)
-    origin_departures = stop_departures.get(origin_id, [])
-    valid_starts = [node_id for node_id, dep_time in origin_departures 
-                   if dep_time >= start_time_secs]
-    
-    print(f"Found {len(valid_starts)} valid starting nodes from {origin_id}")
+    Find the earliest arrival journey that leaves origin_id as late as possible.
     
-    if not valid_starts:
-        return None
-    
-    # Find all destination nodes
-    dest_departures = stop_departures.get(dest_id, [])
-    dest_nodes = [node_id for node_id, _ in dest_departures]
-    
-    print(f"Found {len(dest_nodes)} destination nodes at {dest_id}")
-    
-    if not dest_nodes:
+    RAPTOR boards the first catchable trip, which can mean waiting at an
+    intermediate stop. Arrival time never decreases with a later start, so
+    the later origin departures are binary searched for the last one that
+    still reaches dest_id at the earliest arrival time with no more legs
+    than the first journey. Given stops, the searches are pruned with
+    distance-based travel time bounds.
+    """
+    lower_bounds = None
+    if stops:
+        lower_bounds = timetable.travel_time_bounds.get(dest_id)
+        if lower_bounds is None:
+            lower_bounds = timetable.travel_time_bounds[dest_id] = _travel_time_bounds(
+                stops, timetable.routes_by_stop, dest_id
+            )
+    legs = raptor_earliest_arrival(timetable, trips, origin_id, dest_id, start_time_secs, lower_bounds=lower_bounds)
+    if legs is None:
         return None
+    arrival, max_legs = _journey_arrival(legs, trips), len(legs)
+    first_trip, first_position, _ = legs[0]
+    first_departure = trips.departure_secs[trips.trip_offsets[first_trip] + first_position]
     
-    # Find shortest path from any valid start to any destination
-    best_path = None
-    best_arrival_time = math.inf
-    
-    # Limit the search to avoid timeout - try only first few starting points
-    max_starts_to_try = min(10, len(valid_starts))
-    
-    for i, start_node in enumerate(valid_starts[:max_starts_to_try]):
-        if i > 0 and i % 5 == 0:
-            print(f"Tried {i} starting nodes...")
-            
-        # Use multi-target Dijkstra to find shortest paths to all possible destinations
-        try:
-            lengths, paths = nx.single_source_dijkstra(G, start_node, weight='weight')
-            
-            for dest_node in dest_nodes:
-                if dest_node in lengths:
-                    arrival_time = G.nodes[dest_node]["arrival_time"]
-                    if arrival_time < best_arrival_time:
-                        best_arrival_time = arrival_time
-                        best_path = paths[dest_node]
-        except nx.NetworkXNoPath:
-            continue
-    
-    return best_path
+    departures = sorted({
+        departure
+        for pattern_idx, position in timetable.routes_by_stop.get(origin_id, ())
+        for departure in timetable.patterns[pattern_idx].departures[position]
+        if departure > first_departure
+    })
+    lo, hi = 0, len(departures)
+    while lo < hi:
+        mid = (lo + hi) // 2
+        later = raptor_earliest_arrival(
+            timetable, trips, origin_id, dest_id, departures[mid], max_rounds=max_legs,
+            lower_bounds=lower_bounds, arrival_limit=arrival + 1
+        )
+        if later is not None:
+            legs = later
+            lo = mid + 1
+        else:
+            hi = mid
+    return legs
 
 
-def path_to_detailed_route(
-    G: nx.DiGraph,
-    path: List[str],
+def journey_to_detailed_route(
+    legs: List[Leg],
+    trips: StopTimes,
     stops: Dict[str, Stop],
+    routes: Dict[str, dict],
+    trip_routes: Dict[str, dict],
     origin_id: str,
     dest_id: str,
     start_time: str,
     date: str
 ) -> dict:
     """
-    Convert NetworkX path to the detailed route format expected by the API,
-    and clean up redundant transfers.
+    Convert RAPTOR legs to the detailed route format expected by the API.
     """
-    if not path:
+    if not legs:
         return {"error": "No path found"}
 
-    # Handle transfer at the origin: if the first action is a transfer, start the route from the second node.
-    if len(path) > 1:
-        first_node = G.nodes[path[0]]
-        second_node = G.nodes[path[1]]
-        if first_node["stop_id"] == second_node["stop_id"] and first_node["trip_id"] != second_node["trip_id"]:
-            path = path[1:]
-
-    # Path cleanup to remove redundant transfers
-    if len(path) > 1:
-        cleaned_path = [path[0]]
-        i = 1
-        while i < len(path):
-            current_node_id = path[i]
-            prev_node_id = cleaned_path[-1]
-            
-            current_stop_id = G.nodes[current_node_id]["stop_id"]
-            prev_stop_id = G.nodes[prev_node_id]["stop_id"]
-            
-            # Check for self-transfer (transfer at same stop to a new trip)
-            if current_stop_id == prev_stop_id:
-                # Look ahead to see if the next stop is also the same, which means we are just waiting
-                if i + 1 < len(path):
-                    next_node_id = path[i+1]
-                    next_stop_id = G.nodes[next_node_id]["stop_id"]
-                    if next_stop_id == current_stop_id:
-                        # This is a redundant transfer, skip to the next node
-                        i += 1
-                        continue
-            
-            cleaned_path.append(current_node_id)
-            i += 1
-        path = cleaned_path
-
     processed_stops = []
     transfers = []
     last_trip_id = None
+    last_route_id = ""
+    start_secs = final_arrival_secs = None
     
-    for i, node_id in enumerate(path):
-        node_data = G.nodes[node_id]
-        stop_id = node_data["stop_id"]
-        trip_id = node_data["trip_id"]
-        route_id = node_data["route_id"]
-        
-        # Get stop coordinates
-        stop_obj = stops.get(stop_id)
-        stop_lat = stop_obj.lat if stop_obj else 0.0
-        stop_lon = stop_obj.lon if stop_obj else 0.0
-        
-        # Convert times back to string format
-        arrival_time = seconds_to_time(node_data["arrival_time"])
-        departure_time = seconds_to_time(node_data["departure_time"])
-        
-        # Check for transfers
-        is_transfer = False
-        transfer_note = ""
+    for trip_idx, board_position, alight_position in legs:
+        trip_id = trips.trip_ids[trip_idx]
+        trip_info = trip_routes.get(trip_id, {})
+        route_id = trip_info.get("route_id", "")
+        route_info = routes.get(route_id, {})
+        offset = trips.trip_offsets[trip_idx]
         
-        if i > 0 and last_trip_id is not None and trip_id != last_trip_id:
-            is_transfer = True
-            transfer_note = f"Transfer from trip {last_trip_id} to trip {trip_id}"
-            transfers.append({
-                "at_stop": node_data["stop_name"],
+        for position in range(board_position, alight_position + 1):
+            row = offset + position
+            arrival_secs = trips.arrival_secs[row]
+            departure_secs = trips.departure_secs[row]
+            
+            # Skip intermediate stops without times; the ends fall back to the other time
+            if position not in (board_position, alight_position) and (arrival_secs < 0 or departure_secs < 0):
+                continue
+            if arrival_secs < 0:
+                arrival_secs = departure_secs
+            if departure_secs < 0:
+                departure_secs = arrival_secs
+            if start_secs is None:
+                start_secs = departure_secs
+            final_arrival_secs = arrival_secs
+            
+            stop_id = trips.stop_ids[row]
+            stop_obj = stops.get(stop_id)
+            stop_name = stop_obj.name if stop_obj else ""
+            stop_lat = stop_obj.lat if stop_obj else 0.0
+            stop_lon = stop_obj.lon if stop_obj else 0.0
+            
+            # Check for transfers
+            is_transfer = False
+            transfer_note = ""
+            
+            if last_trip_id is not None and trip_id != last_trip_id:
+                is_transfer = True
+                transfer_note = f"Transfer from trip {last_trip_id} to trip {trip_id}"
+                transfers.append({
+                    "at_stop": stop_name,
+                    "stop_id": stop_id,
+                    "stop_lat": stop_lat,
+                    "stop_lon": stop_lon,
+                    "transfer_info": transfer_note,
+                    "from_trip": last_trip_id,
+                    "to_trip": trip_id,
+                    "from_route": last_route_id,
+                    "to_route": route_id
+                })
+            
+            # Add stop to detailed route
+            stop_info = {
                 "stop_id": stop_id,
+                "stop_name": stop_name,
                 "stop_lat": stop_lat,
                 "stop_lon": stop_lon,
-                "transfer_info": transfer_note,
-                "from_trip": last_trip_id,
-                "to_trip": trip_id,
-                "from_route": G.nodes[path[i-1]]["route_id"] if i > 0 else "",
-                "to_route": route_id
-            })
-        
-        # Add stop to detailed route
-        stop_info = {
-            "stop_id": stop_id,
-            "stop_name": node_data["stop_name"],
-            "stop_lat": stop_lat,
-            "stop_lon": stop_lon,
-            "arrival_time": arrival_time,
-            "departure_time": departure_time,
-            "trip_id": trip_id,
-            "route_id": route_id,
-            "route_name": node_data["route_name"],
-            "route_description": node_data["route_description"],
-            "trip_headsign": node_data.get("trip_headsign", ""),
-            "trip_short_name": node_data.get("trip_short_name", ""),
-            "date": node_data.get("date", date),
-            "is_transfer": is_transfer
-        }
-        
-        if is_transfer:
-            stop_info["transfer_note"] = transfer_note
-            stop_info["transfer_type"] = "departure"
-        
-        processed_stops.append(stop_info)
-        last_trip_id = trip_id
-    
-    # Calculate total travel time
-    start_secs = G.nodes[path[0]]["departure_time"]
-    final_arrival_secs = G.nodes[path[-1]]["arrival_time"]
+                "arrival_time": seconds_to_time(arrival_secs),
+                "departure_time": seconds_to_time(departure_secs),
+                "trip_id": trip_id,
+                "route_id": route_id,
+                "route_name": route_info.get("route_short_name", route_id),
+                "route_description": route_info.get("route_long_name", ""),
+                "trip_headsign": trip_info.get("trip_headsign", ""),
+                "trip_short_name": trip_info.get("trip_short_name", ""),
+                "date": date,
+                "is_transfer": is_transfer
+            }
+            
+            if is_transfer:
+                stop_info["transfer_note"] = transfer_note
+                stop_info["transfer_type"] = "departure"
+            
+            processed_stops.append(stop_info)
+            last_trip_id = trip_id
+            last_route_id = route_id
     
-    # The path weight from Dijkstra includes penalties, so we calculate travel time from start/end times
+    # Calculate total travel time from the first departure to the final arrival
     total_travel_minutes = round((final_arrival_secs - start_secs) / 60, 1) if start_secs else 0
     
     return {
@@ -358,50 +448,57 @@ def path_to_detailed_route(
 
 
 def earliest_arrival_routing(
-    stops: Dict[str, Stop],
-    trips: Dict[str, List[dict]],
-    routes: Dict[str, dict],
-    trip_routes: Dict[str, dict],
+    feed: GTFSData,
     origin_id: str,
     dest_id: str,
     start_time: str,
     date: str
 ) -> dict:
     """
-    Returns detailed route with all stops and transfer information using NetworkX.
+    Returns detailed route with all stops and transfer information using RAPTOR.
     """
+    stops, trips = feed.stops, feed.trips
     start_secs = parse_time_to_seconds(start_time)
     date = date.replace("-", "")
     if start_secs is None:
         return {"error": f"Invalid start_time: {start_time}"}
     
-    # Build the transit graph
-    G, stop_departures = build_transit_graph(stops, trips, routes, trip_routes, start_secs, date)
+    # Group the day's trips into route patterns
+    timetable = get_timetable(feed, date)
     
-    # Find the shortest path
-    path = find_earliest_arrival_path(G, stop_departures, origin_id, dest_id, start_secs)
+    # Find the earliest arrival journey
+    legs = find_journey(timetable, trips, origin_id, dest_id, start_secs, stops)
     
-    if path is None:
+    if legs is None:
         return {"error": f"No route found from {stops[origin_id].name} to {stops[dest_id].name} after {start_time} on {date}"}
     
-    # Convert path to detailed route format
-    return path_to_detailed_route(G, path, stops, origin_id, dest_id, start_time, date)
-
-def compute_route(origin_id: str, dest_id: str, start_time: str, date: str, data_dir: Path = DATA_DIR_DEFAULT):
-    stops_path = data_dir / "stops.csv"
-    stop_times_path = data_dir / "stop_times.csv"
-    routes_path = data_dir / "routes.csv"
-    trips_path = data_dir / "trips.csv"
-    
-    stops = load_stops(stops_path)
-    trips = load_stop_times_by_trip(stop_times_path)
-    routes = load_routes_info(routes_path)
-    trip_routes = load_trips_info(trips_path)
+    # Convert journey to detailed route format
+    return journey_to_detailed_route(legs, trips, stops, feed.routes, feed.trip_routes, origin_id, dest_id, start_time, date)
+
+def warmup(date: str, data_dir: Path = DATA_DIR_DEFAULT) -> None:
+    """
+    Load the feed and build date's timetable ahead of the first query.
+    """
+    get_timetable(load_gtfs(data_dir), date.replace("-", ""))
+
+def resolve_stop_id(query: str, stops: Dict[str, Stop], stop_names: StopNameIndex) -> Optional[str]:
+    """
+    Resolve a stop id or a (partial, case-insensitive) stop name to a stop id.
+    """
+    if query in stops:
+        return query
+    return stop_names.lookup(query)
+
+def compute_route(origin: str, destination: str, start_time: str, date: str, data_dir: Path = DATA_DIR_DEFAULT):
+    feed = load_gtfs(data_dir)
+    stops, stop_names = feed.stops, feed.stop_names
     
+    origin_id = resolve_stop_id(origin, stops, stop_names)
+    dest_id = resolve_stop_id(destination, stops, stop_names)
     if origin_id is None:
-        raise ValueError(f"Origin stop not found: {stops[origin_id].name}")
+        raise ValueError(f"Origin stop not found: {origin}")
     if dest_id is None:
-        raise ValueError(f"Destination stop not found: {stops[dest_id].name}")
+        raise ValueError(f"Destination stop not found: {destination}")
     if origin_id == dest_id:
         return {
             "origin": origin_id,
@@ -417,7 +514,7 @@ def compute_route(origin_id: str, dest_id: str, start_time: str, date: str, data
             }],
             "note": "Origin equals destination",
         }
-    return earliest_arrival_routing(stops, trips, routes, trip_routes, origin_id, dest_id, start_time, date)
+    return earliest_arrival_routing(feed, origin_id, dest_id, start_time, date)
 
 def getRoute(station1: str, station2: str, start_time: str = "08:00:00", date: str = "20241215", data_dir: Path = DATA_DIR_DEFAULT) -> dict:
     try:
@@ -0,0 +1,126 @@
+"""
+Tests for the GTFS loaders in loading.py.
+
+Run from the routing directory with:
+    python -m pytest test_loading.py
+"""
+
+import random
+from pathlib import Path
+
+import pytest
+
+import loading
+from loading import (Stop, StopNameIndex, load_stop_times_by_trip, load_stops,
+                     read_columns)
+
+DATA_DIR = Path(__file__).resolve().parent.parent / "public" / "data"
+
+
+def write_csv(path: Path, text: str) -> Path:
+    path.write_text(text, encoding="utf-8")
+    return path
+
+
+def test_read_columns_skips_blank_lines_and_pads_short_rows(tmp_path):
+    path = write_csv(tmp_path / "stops.csv", (
+        "stop_id,stop_name,stop_lat,stop_lon\n"
+        "1,Alpha,39.2,9.1\n"
+        "\n"
+        "2,Beta\n"
+        "3,Gamma,40.0,9.5\n"
+    ))
+    rows = list(read_columns(path, ["stop_id", "stop_lon", "platform_code"]))
+    assert rows == [("1", "9.1", ""), ("2", "", ""), ("3", "9.5", "")]
+    assert list(read_columns(path, ["stop_name"])) == [("Alpha",), ("Beta",), ("Gamma",)]
+
+
+def test_load_stops_tolerates_blank_lines_and_short_rows(tmp_path, monkeypatch):
+    monkeypatch.setattr(loading, "pq", None)  # read the CSV, not a Parquet copy
+    path = write_csv(tmp_path / "stops.csv", (
+        "stop_id,stop_name,stop_lat,stop_lon\n"
+        "1,Alpha,39.2,9.1\n"
+        "\n"
+        "2,Beta\n"
+        "3,Gamma,40.0,9.5\n"
+    ))
+    stops = load_stops(path)
+    assert sorted(stops) == ["1", "2", "3"]
+    # Missing coordinates read as blanks, which load as 0.0
+    assert (stops["2"].name, stops["2"].lat, stops["2"].lon) == ("Beta", 0.0, 0.0)
+    assert stops["3"].name == "Gamma"
+
+
+def test_stop_times_loaders_agree_on_shuffled_rows(tmp_path, monkeypatch):
+    pytest.importorskip("pyarrow")
+    header, *rows = (DATA_DIR / "stop_times.csv").read_text(encoding="utf-8").splitlines()
+    random.Random(0).shuffle(rows)
+    path = write_csv(tmp_path / "stop_times.csv", "\n".join([header, *rows]) + "\n")
+
+    bulk = load_stop_times_by_trip(path)
+    monkeypatch.setattr(loading, "pa", None)  # force the streaming loader
+    streamed = load_stop_times_by_trip(path)
+
+    assert bulk == streamed
+    assert len(bulk.stop_ids) == len(rows)
+    # Rows come back grouped by trip and ordered by stop_sequence
+    for trip_idx in range(len(bulk.trip_ids)):
+        sequences = bulk.stop_sequences[bulk.trip_offsets[trip_idx]:bulk.trip_offsets[trip_idx + 1]]
+        assert list(sequences) == sorted(sequences)
+
+
+@pytest.fixture
+def name_index():
+    names = {
+        "1": "Stazione di OLBIA TERRANOVA",
+        "2": "Stazione di OLBIA",
+        "3": "Stazione di CAGLIARI",
+        "4": "Stazione di MACOMER",
+        "5": "Stazione di SASSARI",
+    }
+    return StopNameIndex({stop_id: Stop(stop_id, name, 0.0, 0.0) for stop_id, name in names.items()})
+
+
+def test_stop_name_index_exact_match_beats_prefix(name_index):
+    assert name_index.lookup("Stazione di OLBIA") == "2"
+    assert name_index.lookup("Stazione di OLBIA TERRANOVA") == "1"
+
+
+def test_stop_name_index_prefix_match_takes_first_name_in_order(name_index):
+    assert name_index.lookup("Stazione di C") == "3"
+    assert name_index.lookup("Stazione di") == "3"  # "cagliari" sorts first
+
+
+def test_stop_name_index_substring_match(name_index):
+    assert name_index.lookup("macomer") == "4"
+    assert name_index.lookup("terranova") == "1"
+    assert name_index.lookup("ss") == "5"  # shorter than a trigram
+
+
+def test_stop_name_index_is_case_insensitive(name_index):
+    assert name_index.lookup("  sassari ") == "5"
+    assert name_index.lookup("sTaZiOnE dI oLbIa") == "2"
+
+
+def test_stop_name_index_no_match(name_index):
+    assert name_index.lookup("Nuoro") is None
+    assert name_index.lookup("olbiaa") is None
+    assert name_index.lookup("   ") is None
+
+
+def test_stop_name_index_agrees_with_a_linear_scan():
+    stops = load_stops(DATA_DIR / "stops.csv")
+    index = StopNameIndex(stops)
+    names = sorted((stop.name.lower(), stop_id) for stop_id, stop in stops.items())
+
+    def scan(query):
+        q = query.strip().lower()
+        for match in (lambda name: name == q, lambda name: name.startswith(q), lambda name: q in name):
+            for name, stop_id in names:
+                if match(name):
+                    return stop_id
+        return None
+
+    for name, _ in names:
+        for query in (name, name[:8], name[-6:], name[5:12].upper(), name[3:5], name + "x"):
+            assert index.lookup(query) == scan(query), query
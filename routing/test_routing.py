@@ -0,0 +1,172 @@
+"""
+Tests for the RAPTOR router in routing.py, run against the bundled GTFS feed.
+
+Run from the routing directory with:
+    python -m pytest test_routing.py
+"""
+
+import dataclasses
+import math
+from pathlib import Path
+
+import pytest
+
+import loading
+from loading import load_gtfs, parse_time_to_seconds
+from routing import (SEARCH_HORIZON_SECS, build_timetable, compute_route,
+                     find_journey, get_timetable, getRoute,
+                     raptor_earliest_arrival)
+
+DATA_DIR = Path(__file__).resolve().parent.parent / "public" / "data"
+DATE = "20241215"
+START_TIMES = ["06:00:00", "08:00:00", "13:30:00"]
+
+
+@pytest.fixture(scope="module", autouse=True)
+def gtfs_cache_dir(tmp_path_factory):
+    """Pickle the feed to a temporary directory instead of routing/.cache."""
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.setattr(loading, "GTFS_CACHE_DIR", tmp_path_factory.mktemp("gtfs_cache"))
+        monkeypatch.setattr(loading, "_GTFS_CACHE", {})
+        yield
+
+
+@pytest.fixture(scope="module")
+def feed():
+    return load_gtfs(DATA_DIR)
+
+
+@pytest.fixture(scope="module")
+def timetable(feed):
+    return get_timetable(feed, DATE)
+
+
+def connection_scan(feed, origin_id, start_secs):
+    """Earliest arrival at every stop by a brute-force connection scan over the day's trips."""
+    trips = feed.trips
+    active = feed.services_by_date.get(DATE, set())
+    connections = []
+    for trip_idx, trip_id in enumerate(trips.trip_ids):
+        if feed.trip_routes.get(trip_id, {}).get("service_id") not in active:
+            continue
+        last = None  # (stop_id, departure) of the last stop the trip can be boarded at
+        for row in trips.trip_rows(trip_idx):
+            stop_id = trips.stop_ids[row]
+            arrival, departure = trips.arrival_secs[row], trips.departure_secs[row]
+            if last is not None and arrival >= 0:
+                connections.append((last[1], arrival, last[0], stop_id, trip_idx))
+            if departure >= 0:
+                last = (stop_id, departure)
+    connections.sort()
+
+    horizon = start_secs + SEARCH_HORIZON_SECS
+    best = {origin_id: start_secs}
+    boarded = set()
+    for departure, arrival, from_stop, to_stop, trip_idx in connections:
+        if trip_idx not in boarded:
+            if departure < best.get(from_stop, math.inf) or departure > horizon:
+                continue
+            boarded.add(trip_idx)
+        if arrival < best.get(to_stop, math.inf):
+            best[to_stop] = arrival
+    return best
+
+
+def _arrival(trips, legs):
+    trip_idx, _, alight_position = legs[-1]
+    return trips.arrival_secs[trips.trip_offsets[trip_idx] + alight_position]
+
+
+def test_arrivals_match_connection_scan(feed, timetable):
+    trips = feed.trips
+    stop_ids = sorted(feed.stops)
+    for start_time in START_TIMES:
+        start_secs = parse_time_to_seconds(start_time)
+        for origin_id in stop_ids:
+            reference = connection_scan(feed, origin_id, start_secs)
+            for dest_id in stop_ids:
+                if dest_id == origin_id:
+                    continue
+                legs = find_journey(timetable, trips, origin_id, dest_id, start_secs, feed.stops)
+                expected = reference.get(dest_id)
+                if legs is None:
+                    assert expected is None, (origin_id, dest_id, start_time)
+                    continue
+                assert _arrival(trips, legs) == expected, (origin_id, dest_id, start_time)
+
+
+@pytest.mark.parametrize("blank_id", ["830013703", "830012956"])
+def test_pruning_ignores_stops_without_coordinates(feed, blank_id):
+    # A fresh timetable, so the bounds cached per destination come from these stops
+    timetable = build_timetable(feed.trips, feed.trip_routes, feed.services_by_date, DATE)
+    stops = dict(feed.stops)
+    stops[blank_id] = dataclasses.replace(stops[blank_id], lat=0.0, lon=0.0)
+    stop_ids = sorted(stops)
+    for start_time in START_TIMES:
+        start_secs = parse_time_to_seconds(start_time)
+        for origin_id in stop_ids:
+            for dest_id in stop_ids:
+                if dest_id == origin_id:
+                    continue
+                pruned = find_journey(timetable, feed.trips, origin_id, dest_id, start_secs, stops)
+                unpruned = find_journey(timetable, feed.trips, origin_id, dest_id, start_secs)
+                arrivals = [legs and _arrival(feed.trips, legs) for legs in (pruned, unpruned)]
+                assert arrivals[0] == arrivals[1], (origin_id, dest_id, start_time)
+
+
+def test_later_departure_adds_no_legs(feed, timetable):
+    trips = feed.trips
+    stop_ids = sorted(feed.stops)
+    for start_time in START_TIMES + ["13:00:00"]:
+        start_secs = parse_time_to_seconds(start_time)
+        for origin_id in stop_ids:
+            for dest_id in stop_ids:
+                if dest_id == origin_id:
+                    continue
+                earliest = raptor_earliest_arrival(timetable, trips, origin_id, dest_id, start_secs)
+                legs = find_journey(timetable, trips, origin_id, dest_id, start_secs, feed.stops)
+                if earliest is None:
+                    assert legs is None, (origin_id, dest_id, start_time)
+                    continue
+                assert len(legs) <= len(earliest), (origin_id, dest_id, start_time)
+
+
+def test_legs_are_feasible(feed, timetable):
+    trips = feed.trips
+    stop_ids = sorted(feed.stops)
+    start_secs = parse_time_to_seconds("08:00:00")
+    for origin_id in stop_ids:
+        for dest_id in stop_ids:
+            if dest_id == origin_id:
+                continue
+            legs = find_journey(timetable, trips, origin_id, dest_id, start_secs, feed.stops)
+            if legs is None:
+                continue
+            stop_id, ready = origin_id, start_secs
+            for trip_idx, board_position, alight_position in legs:
+                offset = trips.trip_offsets[trip_idx]
+                board, alight = offset + board_position, offset + alight_position
+                assert board_position < alight_position
+                assert trips.stop_ids[board] == stop_id
+                assert trips.departure_secs[board] >= ready
+                assert trips.arrival_secs[alight] >= trips.departure_secs[board]
+                stop_id, ready = trips.stop_ids[alight], trips.arrival_secs[alight]
+            assert stop_id == dest_id
+
+
+def test_origin_equals_destination():
+    origin_id = "830012810"
+    route = compute_route(origin_id, origin_id, "08:00:00", DATE, DATA_DIR)
+    assert route["total_travel_minutes"] == 0
+    assert [stop["stop_id"] for stop in route["detailed_route"]] == [origin_id]
+
+
+def test_unknown_stop():
+    with pytest.raises(ValueError):
+        compute_route("no-such-stop", "830012810", "08:00:00", DATE, DATA_DIR)
+    assert "error" in getRoute("830012810", "no-such-stop", "08:00:00", DATE, DATA_DIR)
+
+
+def test_invalid_start_time():
+    route = getRoute("830012810", "830012819", "25:99:00", DATE, DATA_DIR)
+    assert route["error"].startswith("Invalid start_time")
@@ -0,0 +1,10 @@
+import pandas as pd, pathlib
+data_dir = pathlib.Path("public/data")
+# Write a Parquet copy of every GTFS CSV next to it. Values are kept as the
+# original strings so the loaders treat both formats the same way; the
+# repetitive id columns compress well under Parquet's dictionary encoding.
+for p in data_dir.glob("*.csv"):
+    df = pd.read_csv(p, dtype=str, keep_default_na=False)
+    out = p.with_suffix(".parquet")
+    df.to_parquet(out, index=False, compression="zstd")
+    print(f"{p.name}: {p.stat().st_size} -> {out.stat().st_size} bytes ({out.name})")
@@ -0,0 +1,10 @@
+"""
+WSGI entry point for serving the routing API with a production server.
+
+Run from the repository root so the default data directory resolves:
+    gunicorn --pythonpath routing --preload -w 4 -b 0.0.0.0:8080 wsgi:app
+"""
+
+from api import app
+
+__all__ = ["app"]